@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+"""asyncio front end for :class:`~fixedrec.fixedrec.RecordFile` (Python 3).
+
+   Usage::
+
+       rf = AsyncRecordFile(fname, blocksize=256)
+       rec = await rf.get(42)
+       recs = await rf.get_many([7, 3, 1001])
+       await rf.append(data)
+       await rf.flush()
+       async for rec in rf:
+           ...
+       await rf.close()
+
+   The blocking I/O runs in a bounded thread pool. Concurrent :meth:`get`
+   calls made in the same event loop iteration are batched into a single
+   :meth:`~fixedrec.fixedrec.RecordFile.get_many` call. Writes run, in
+   order, on a single writer thread.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from .fixedrec import RecordFile, DEFAULT_CHUNKSIZE
+
+
+class AsyncRecordFile(object):
+    """Awaitable wrapper around a :class:`RecordFile`.
+       `max_workers` bounds the number of reader threads, all other arguments
+       are passed on to :class:`RecordFile` (positional I/O is used by
+       default when the platform supports it).
+    """
+
+    def __init__(self, fname, blocksize=4, max_workers=4, **kw):
+        kw.setdefault('positional', hasattr(os, 'pread'))
+        self.rf = RecordFile(fname, blocksize, **kw)
+        self.readers = ThreadPoolExecutor(max_workers)
+        self.writer = ThreadPoolExecutor(1)
+        self._pending = {}        # recnum -> [futures waiting for it]
+
+    def __len__(self):
+        return len(self.rf)
+
+    def _read(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self.readers, partial(fn, *args))
+
+    def _write(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self.writer, partial(fn, *args))
+
+    def get(self, n):
+        "Return a future for record number `n`."
+        loop = asyncio.get_event_loop()
+        fut = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._fetch_pending)
+        self._pending.setdefault(n, []).append(fut)
+        return fut
+
+    def _fetch_pending(self):
+        "Read all records requested since the last call with one get_many."
+        pending, self._pending = self._pending, {}
+        job = self._read(self.rf.get_many, list(pending))
+        job.add_done_callback(partial(self._resolve, pending))
+
+    @staticmethod
+    def _resolve(pending, job):
+        exc = asyncio.CancelledError() if job.cancelled() else job.exception()
+        records = None if exc else job.result()
+        for i, futs in enumerate(pending.values()):
+            for fut in futs:
+                if fut.cancelled():
+                    continue
+                if exc:
+                    fut.set_exception(exc)
+                else:
+                    fut.set_result(records[i])
+
+    def get_many(self, recnums, gap=16):
+        "Return a future for :meth:`RecordFile.get_many`."
+        return self._read(self.rf.get_many, recnums, gap)
+
+    def append(self, data):
+        "Return a future for appending the record `data`."
+        return self._write(self.rf.__setitem__, -1, data)
+
+    def write_many(self, records, start=-1):
+        """Return a future for writing `records` starting at record `start`
+           (by default they are appended).
+        """
+        return self._write(self._write_many, records, start)
+
+    def _write_many(self, records, start):
+        if start == -1:
+            return self.rf.extend(records)
+        self.rf.goto_recnum(start)
+        return self.rf.write_many(records)
+
+    def flush(self):
+        "Return a future for flushing all writes made so far."
+        return self._write(self.rf.flush)
+
+    def commit(self):
+        "Return a future for committing all writes made so far."
+        return self._write(self.rf.commit)
+
+    def close(self):
+        "Return a future for closing the file (after all pending writes)."
+        fut = self._write(self.rf.close)
+        fut.add_done_callback(lambda f: self._shutdown())
+        return fut
+
+    def _shutdown(self):
+        self.readers.shutdown(wait=False)
+        self.writer.shutdown(wait=False)
+
+    def __aenter__(self):
+        fut = asyncio.get_event_loop().create_future()
+        fut.set_result(self)
+        return fut
+
+    def __aexit__(self, type, value, tb):
+        return self.close()
+
+    def __aiter__(self):
+        return AsyncRecordIterator(self)
+
+
+class AsyncRecordIterator(object):
+    """Async iterator over all records, reading chunks of `chunksize` bytes
+       in the reader pool.
+    """
+
+    def __init__(self, arf, chunksize=DEFAULT_CHUNKSIZE):
+        self.arf = arf
+        self.chunks = arf.rf._chunks(chunksize)
+        self.records = []
+
+    def __aiter__(self):
+        return self
+
+    def _next_chunk(self):
+        bs = self.arf.rf.blocksize
+        for _recnum, data in self.chunks:
+            return [data[pos:pos + bs] for pos in range(0, len(data), bs)]
+        return []
+
+    def _deliver(self, fut, job):
+        if fut.cancelled():
+            return
+        if job.exception():
+            return fut.set_exception(job.exception())
+        self.records = job.result()
+        self.records.reverse()
+        if self.records:
+            fut.set_result(self.records.pop())
+        else:
+            fut.set_exception(StopAsyncIteration())
+
+    def __anext__(self):
+        fut = asyncio.get_event_loop().create_future()
+        if self.records:
+            fut.set_result(self.records.pop())
+        else:
+            job = self.arf._read(self._next_chunk)
+            job.add_done_callback(partial(self._deliver, fut))
+        return fut
@@ -8,13 +8,29 @@
    Listed in its own file to preserve original copyright statement and
    conditions.
 """
+import array
 
-def bsd_checksum(data):
-    """Implementation of the bsd 16-bit checksum algorithm.
+_PY2 = bytes is str
+
+
+def _octets(data):
+    """Return something that iterates over the byte values (ints) of
+       `data`, copying only when there is no other way.
     """
-    if not isinstance(data, bytearray):
-        data = bytearray(data)  # pragma: no cover
-    r = 0
+    if isinstance(data, bytearray):
+        return data
+    if not _PY2:
+        if isinstance(data, bytes):
+            return data
+        if isinstance(data, memoryview):
+            if data.format != 'B' or data.ndim != 1:
+                return data.cast('B')
+            return data
+    return bytearray(data)
+
+
+def _update(r, data):
+    "Add the byte values `data` to the running checksum `r`."
     for ch in data:
         if r & 1:
             r |= 0x10000
@@ -22,6 +38,114 @@ def bsd_checksum(data):
     return r
 
 
+def bsd_checksum(data):
+    """Implementation of the bsd 16-bit checksum algorithm.
+    """
+    return _update(0, _octets(data))
+
+
+class BsdChecksum(object):
+    """Incremental bsd checksum with a :mod:`hashlib` like interface.
+
+       Usage::
+
+           cs = BsdChecksum()
+           for chunk in chunks:
+               cs.update(chunk)
+           cs.digest()
+
+       `value` and `length` can be saved and passed back to the constructor
+       to resume the checksum later (e.g. after a file has been appended to).
+    """
+    name = 'bsd'
+
+    def __init__(self, data=None, value=0, length=0):
+        self.value = value
+        self.length = length
+        if data is not None:
+            self.update(data)
+
+    def update(self, data):
+        """Add `data` (bytes, bytearray, or memoryview, which isn't copied)
+           to the checksum.
+        """
+        data = _octets(data)
+        self.value = _update(self.value, data)
+        self.length += len(data)
+
+    def digest(self):
+        "Return the 16-bit checksum of the data so far."
+        return self.value
+
+    def hexdigest(self):
+        "Return the checksum as four hex digits."
+        return '%04x' % self.value
+
+    def copy(self):
+        "Return a copy of the checksum object."
+        return BsdChecksum(value=self.value, length=self.length)
+
+
+def checksum_file(path, bufsize=8192, checksum=None):
+    """Return ``(checksum, length)`` for the file at `path`, like the
+       ``csum1`` routine below, reading `bufsize` bytes at a time.
+
+       If `checksum` (a :class:`BsdChecksum`) is given, it is taken to cover
+       the first ``checksum.length`` bytes of the file, and a copy of it is
+       updated with the rest (so a saved state can be resumed from again).
+    """
+    if checksum is None:
+        checksum = BsdChecksum()
+    else:
+        checksum = checksum.copy()
+    buf = bytearray(bufsize)
+    view = memoryview(buf)
+    with open(path, 'rb') as fp:
+        fp.seek(checksum.length)
+        while True:
+            nr = fp.readinto(buf)
+            if not nr:
+                break
+            checksum.update(view[:nr])
+    return checksum.digest(), checksum.length
+
+
+def bsd_checksum_many(buffer, reclen, nbytes):
+    """Compute the bsd checksum of the first `nbytes` bytes of each of the
+       (whole) `reclen` byte records in `buffer`.
+
+       The algorithm is sequential within a record, but independent across
+       records, so this loops over byte positions and computes all records
+       at once (with numpy when it is available). Returns a sequence of
+       checksums, one per record.
+    """
+    if not 0 <= nbytes <= reclen:
+        raise ValueError("Can't checksum %d bytes of %d byte records." % (
+            nbytes, reclen))
+    n = len(buffer) // reclen
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        data = np.frombuffer(buffer, np.uint8, n * reclen).reshape(n, reclen)
+        r = np.zeros(n, np.uint32)
+        for j in range(nbytes):
+            r = (r >> 1) | ((r & 1) << 15)
+            r += data[:, j]
+            r &= 0xffff
+        return r.astype(np.uint16)
+
+    if not isinstance(buffer, bytearray):
+        buffer = bytearray(buffer)
+    end = n * reclen
+    r = [0] * n
+    for j in range(nbytes):
+        r = [(((x >> 1) | ((x & 1) << 15)) + ch) & 0xffff
+             for x, ch in zip(r, buffer[j:end:reclen])]
+    return array.array('H', r)
+
+
 """
 /*-
  * Copyright (c) 1991, 1993
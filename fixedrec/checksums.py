@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+"""Registry of record checksum algorithms.
+
+   A :class:`~fixedrec.layout.Layout` opts into checksumming by naming an
+   algorithm and the field that holds the checksum (the checksum covers all
+   bytes preceding that field)::
+
+       Layout('=4sQ10sH12xIcc', ..., checksum='crc32', checksum_field='chksum')
+
+   ``crc32`` and ``adler32`` run at C speed (:mod:`zlib`), ``bsd`` is
+   the pure-Python bsd 16-bit checksum, kept for compatibility with existing
+   files.
+"""
+import zlib
+from .bsd_checksum import bsd_checksum
+
+_PY2 = bytes is str
+_checksum_registry = {}
+
+
+def register_checksum(name, fn):
+    """Register the checksum function `fn` (taking a bytes-like object and
+       returning a non-negative int) as `name`.
+    """
+    _checksum_registry[name] = fn
+    return fn
+
+
+def valid_checksum(name):
+    """Is there a checksum algorithm registered as `name`?
+    """
+    return name in _checksum_registry
+
+
+def checksum_function(name):
+    """Return the checksum function registered as `name`.
+    """
+    return _checksum_registry[name]
+
+
+def data_range(buf, start, stop):
+    """Return a zero-copy view of bytes `start` through `stop` of `buf` that
+       all registered checksum functions accept.
+    """
+    if _PY2:
+        # zlib on Python 2 only accepts strings and read-only buffers.
+        return buffer(buf, start, stop - start)
+    return memoryview(buf)[start:stop]
+
+
+register_checksum('bsd', bsd_checksum)
+register_checksum('crc32', lambda data: zlib.crc32(data) & 0xffffffff)
+register_checksum('adler32', lambda data: zlib.adler32(data) & 0xffffffff)
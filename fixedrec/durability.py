@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""Commit policies deciding when writes to a :class:`RecordFile` are flushed
+   and when they are made durable (``fsync``).
+
+   Usage::
+
+       RecordFile(fname, blocksize=256, commit='none')
+       RecordFile(fname, blocksize=256, commit=FsyncEvery(1000))
+       RecordFile(fname, blocksize=256, commit=FsyncInterval(50))
+
+   A policy instance keeps state for the file it is attached to, so each
+   :class:`RecordFile` needs its own instance.
+
+   All policies share a group commit: threads calling :meth:`commit` while
+   an ``fsync`` is in progress wait for it and, if their writes were already
+   covered, return without issuing another one.
+"""
+import os
+import threading
+
+
+class CommitPolicy(object):
+    """Base class for commit policies.
+    """
+    #: commit outstanding writes when the file is closed?
+    commit_on_close = True
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._written = 0     # number of records written so far
+        self._synced = 0      # _written at the start of the last fsync
+        self._syncing = False
+
+    def written(self, rf, count, flush):
+        """Called by `rf` after `count` records have been written. `flush` is
+           the caller's wish.
+        """
+        with self._cond:
+            self._written += count
+
+    @property
+    def pending(self):
+        "The number of records written since the last commit."
+        return self._written - self._synced
+
+    def commit(self, rf):
+        """Flush and fsync all records written to `rf` so far, sharing the
+           fsync with any concurrent committers.
+        """
+        with self._cond:
+            target = self._written
+            while self._synced < target:
+                if self._syncing:
+                    self._cond.wait()
+                    continue
+                self._syncing = True
+                seq = self._written
+                self._cond.release()
+                try:
+                    rf.flush()
+                    os.fsync(rf.fp.fileno())
+                finally:
+                    self._cond.acquire()
+                    self._syncing = False
+                    self._cond.notify_all()
+                self._synced = seq
+
+    def close(self, rf):
+        "Called by `rf` before the file is closed."
+        if self.commit_on_close:
+            self.commit(rf)
+
+
+class NoCommit(CommitPolicy):
+    """Never flush on write (data reaches the OS when buffers fill up, or
+       the file is closed).
+    """
+    commit_on_close = False
+
+
+class FlushPerWrite(CommitPolicy):
+    """Flush when the writer asks for it (the default, no fsync).
+    """
+    commit_on_close = False
+
+    def written(self, rf, count, flush):
+        super(FlushPerWrite, self).written(rf, count, flush)
+        if flush:
+            rf.flush()
+
+
+class ExplicitCommit(CommitPolicy):
+    """Only :meth:`RecordFile.commit` (and close) make writes durable.
+    """
+
+
+class FsyncEvery(CommitPolicy):
+    """Commit every `n` records.
+    """
+    def __init__(self, n):
+        super(FsyncEvery, self).__init__()
+        self.n = n
+
+    def written(self, rf, count, flush):
+        super(FsyncEvery, self).written(rf, count, flush)
+        if self.pending >= self.n:
+            self.commit(rf)
+
+
+class FsyncInterval(CommitPolicy):
+    """Commit at most `ms` milliseconds after a write.
+    """
+    def __init__(self, ms):
+        super(FsyncInterval, self).__init__()
+        self.ms = ms
+        self._timer = None
+
+    def written(self, rf, count, flush):
+        super(FsyncInterval, self).written(rf, count, flush)
+        with self._cond:
+            if self._timer is None:
+                self._timer = threading.Timer(self.ms / 1000.0,
+                                              self._commit, (rf,))
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _commit(self, rf):
+        with self._cond:
+            self._timer = None
+        self.commit(rf)
+
+    def close(self, rf):
+        with self._cond:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        super(FsyncInterval, self).close(rf)
+
+
+#: policies that can be named by a string.
+named_policies = {
+    'none': NoCommit,
+    'flush-per-write': FlushPerWrite,
+    'explicit': ExplicitCommit,
+}
+
+
+def commit_policy(policy):
+    """Return a :class:`CommitPolicy` instance for `policy`, which is either
+       a policy instance or the name of one of the :data:`named_policies`.
+    """
+    if isinstance(policy, CommitPolicy):
+        return policy
+    try:
+        return named_policies[policy]()
+    except KeyError:
+        raise ValueError("Unknown commit policy: %r" % (policy,))
@@ -1,34 +1,81 @@
 # -*- coding: utf-8 -*-
+import mmap
 import os
+import threading
+from .durability import commit_policy
+from .record import _SlottedRecord
+from .recordarray import RecordArray
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    import Queue as queue
 
 
 class RecordFileError(Exception):
     "Base Exception for block files."
 
 
+#: default size (in bytes) of the buffers used for bulk writes.
+DEFAULT_BUFSIZE = 1 << 20
+
+#: default size (in bytes) of the chunks read when scanning a file.
+DEFAULT_CHUNKSIZE = 4 << 20
+
+
 class RecordFile(object):
     """Low level fixed-size record file.
        Record numbers are zero-based.
     """
 
-    def __init__(self, fname, blocksize=4, overwrite=False):
+    def __init__(self, fname, blocksize=4, overwrite=False, use_mmap=False,
+                 bufsize=DEFAULT_BUFSIZE, commit='flush-per-write',
+                 positional=False):
         """Initialize a new RecordFile object.
 
             :param fname:  string
             :param overwrite: bool (True overwrite existing file)
+            :param use_mmap: bool (True to read records from a memory map of
+                             the file, returning zero-copy views instead
+                             of freshly read strings)
+            :param bufsize: int (size in bytes of the buffers used by
+                            :meth:`write_many`)
+            :param commit: name or instance of a
+                           :class:`~fixedrec.durability.CommitPolicy`
+                           (when writes are flushed/fsync'ed)
+            :param positional: bool (True to read and write records by
+                               number with ``os.pread``/``os.pwrite``, so
+                               indexing doesn't use the shared file position
+                               and is safe to use from several threads)
         """
         self.fname = fname
         if hasattr(fname, 'strpath'):
             self.fname = fname.strpath
         self.blocksize = blocksize
         self.overwrite = overwrite
+        self.use_mmap = use_mmap
+        self.bufsize = bufsize
+        self.mm = None          # the memory map (only when use_mmap)
+        self._view = b''        # zero-copy view of self.mm
+        self._old_maps = []     # replaced maps that views still point into
+        self._dirty = False     # written to fp since last flush?
+        self.positional = positional
+        self._lock = threading.RLock()
 
         if not fname:
             raise RecordFileError("Missing file name.")
         if blocksize < 2:
             raise RecordFileError("Block size must be greater than 2 bytes.")
+        try:
+            self.policy = commit_policy(commit)
+        except ValueError as e:
+            raise RecordFileError(str(e))
+        if positional and not hasattr(os, 'pwrite'):
+            raise RecordFileError(
+                "Positional I/O needs os.pread/os.pwrite.")  # pragma: no cover
 
         self.fp = self.open(self.fname, overwrite)
+        self._fd = self.fp.fileno()
+        self._nbytes = self._filesize()   # cached size of the file
 
     def __repr__(self):  # pragma: no cover
         return '\n'.join(list(self))
@@ -42,10 +89,26 @@ class RecordFile(object):
     def __exit__(self, type, value, tb):
         self.close()
 
-    def count(self):
+    def count(self, refresh=False):
         """Return number of records in the fils.
+           The count is kept in memory, pass ``refresh=True`` to re-read the
+           file size from disk (e.g. if another process changed the file).
         """
-        return self._eof() / self.blocksize
+        if refresh:
+            self.refresh()
+        return self._nbytes // self.blocksize
+
+    def refresh(self):
+        "Re-read the size of the file from the file system."
+        if self._dirty:
+            self.flush()
+        self._nbytes = self._filesize()
+
+    def _grown(self, end):
+        "Record that the file now extends to (at least) byte offset `end`."
+        with self._lock:
+            if end > self._nbytes:
+                self._nbytes = end
 
     def goto_recnum(self, n):
         """Position the file at record `n`, if `n` == -1, then go to
@@ -62,7 +125,9 @@ class RecordFile(object):
         "Truncate the file at `recnum` (ie. `recnum` will be gone)."
         if recnum is not None:
             self.goto_recnum(recnum)
+        self._unmap()
         self.fp.truncate()
+        self._nbytes = self.fp.tell()
 
     def goto_recnum_relative(self, n):
         """Advance forward or backward (negative `n`) `n` records.
@@ -79,17 +144,267 @@ class RecordFile(object):
 
     def read(self):
         "Read a block at the current position."
+        if self.use_mmap:
+            pos = self.fp.tell()
+            data = self._mapped(pos, pos + self.blocksize)
+            self.fp.seek(pos + len(data), 0)
+            return data
         return self.fp.read(self.blocksize)
 
-    def write(self, data, flush=True):
-        "Write data to file at current position."
+    def read_many(self, start, count):
+        """Read `count` records starting at record `start` with a single read.
+           Returns a list of views into one buffer (shorter than `count` if
+           the file ends first).
+        """
+        bs = self.blocksize
+        pos = start * bs
+        count = max(0, min(count, len(self) - start))
+        if self.use_mmap:
+            data = self._mapped(pos, pos + count * bs)
+        elif self.positional:
+            data = memoryview(self._read_at(pos, count * bs))
+        else:
+            buf = bytearray(count * bs)
+            data = memoryview(buf)[:self.read_into(start, buf) * bs]
+        return [data[i:i + bs] for i in range(0, len(data) - bs + 1, bs)]
+
+    def get_many(self, recnums, gap=16):
+        """Fetch the records numbered `recnums` (in any order, duplicates
+           allowed), returned in the same order as `recnums`.
+
+           The record numbers are sorted, and records at most `gap` records
+           apart are read together as one span, so only a few (large) reads
+           are needed. Records past the end of the file are
+           returned as empty strings, negative record numbers are an error.
+        """
+        wanted = sorted(set(recnums))
+        if wanted and wanted[0] < 0:
+            raise RecordFileError(
+                "Negative record number: %d" % wanted[0])
+        spans = []
+        for n in wanted:
+            if spans and n - spans[-1][1] <= gap:
+                spans[-1][1] = n
+            else:
+                spans.append([n, n])
+        found = {}
+        for first, last in spans:
+            for i, rec in enumerate(self.read_many(first, last - first + 1)):
+                found[first + i] = rec
+        return [found.get(n, b'') for n in recnums]
+
+    def read_into(self, start, buf):
+        """Read records starting at record `start` into the pre-allocated
+           buffer `buf` (which should be a multiple of the block size).
+           Returns the number of whole records read.
+        """
+        if self._dirty:
+            self.flush()
+        if self.positional and hasattr(os, 'preadv'):
+            nbytes = os.preadv(self._fd, [buf], start * self.blocksize)
+        else:
+            with self._lock:
+                self.goto_recnum(start)
+                nbytes = self.fp.readinto(buf) or 0
+        return nbytes // self.blocksize
+
+    def _check_blocksize(self, data):
         if len(data) != self.blocksize:
             raise RecordFileError(
                 "Tried to write data (%d) which " % len(data) +
                 "didn't fit in blocksize (%d)." % self.blocksize)
+
+    @staticmethod
+    def _serialize(data):
+        """Return the bytes of `data`, :class:`~fixedrec.record.Record`
+           objects get their (auto) checksum filled in.
+        """
+        if isinstance(data, _SlottedRecord):
+            return data.tobytes()
+        return data
+
+    def write(self, data, flush=True):
+        "Write data to file at current position."
+        data = self._serialize(data)
+        self._check_blocksize(data)
         self.fp.write(data)
-        if flush:
-            self.fp.flush()
+        self._dirty = True
+        self._grown(self.fp.tell())
+        self._written(1, flush)
+
+    def _written(self, count, flush):
+        "Let the commit policy know that `count` records were written."
+        self.policy.written(self, count, flush)
+
+    def _read_at(self, pos, size):
+        """Read `size` bytes at byte offset `pos`. With positional I/O this
+           neither uses nor moves the shared file position.
+        """
+        if self._dirty:
+            self.flush()
+        if self.positional:
+            return os.pread(self._fd, size, pos)
+        with self._lock:
+            self.fp.seek(pos, 0)
+            return self.fp.read(size)
+
+    def _write_at(self, recnum, data, flush=True):
+        """Write `data` (whole records) at record `recnum` (-1 appends) with
+           ``os.pwrite``.
+        """
+        if self._dirty:
+            self.flush()
+        count = len(data) // self.blocksize
+        if recnum == -1:
+            with self._lock:   # appends must not race for the end of file
+                pos = self._nbytes
+                self._pwrite(data, pos)
+                self._grown(pos + len(data))
+        else:
+            pos = recnum * self.blocksize
+            self._pwrite(data, pos)
+            self._grown(pos + len(data))
+        self._written(count, flush)
+
+    def _pwrite(self, data, pos):
+        "Write all of `data` at byte offset `pos`."
+        data = memoryview(data)
+        while data:
+            n = os.pwrite(self._fd, data, pos)
+            data, pos = data[n:], pos + n
+
+    def write_many(self, records, flush=False):
+        """Write `records` (any iterable) at the current position.
+           The records are packed into buffers of about `bufsize` bytes,
+           and each buffer is written with a single call. Nothing is flushed
+           unless `flush` is true, call :meth:`flush` when done.
+
+           Returns the number of records written.
+        """
+        bs = self.blocksize
+        perbuf = max(1, self.bufsize // bs)
+        buf = bytearray(perbuf * bs)
+        count = i = 0
+        try:
+            for rec in records:
+                rec = self._serialize(rec)
+                self._check_blocksize(rec)
+                buf[i * bs:(i + 1) * bs] = rec
+                i += 1
+                if i == perbuf:
+                    self.fp.write(buf)
+                    count += i
+                    i = 0
+            if i:
+                self.fp.write(memoryview(buf)[:i * bs])
+                count += i
+        finally:
+            # account for the buffers written, even if a record was bad
+            if count:
+                self._dirty = True
+                self._grown(self.fp.tell())
+                self._written(count, flush)
+        return count
+
+    def extend(self, records, flush=False):
+        """Append `records` to the end of the file (see :meth:`write_many`).
+        """
+        self.goto_recnum(-1)
+        return self.write_many(records, flush)
+
+    def flush(self):
+        "Flush buffered writes to the operating system."
+        # clear the flag first: a concurrent write sets it again after its
+        # data is buffered, so it is never lost.
+        self._dirty = False
+        self.fp.flush()
+
+    def commit(self):
+        """Make all writes so far durable (flush and fsync), see
+           :mod:`fixedrec.durability`.
+        """
+        self.policy.commit(self)
+
+    def write_from(self, start, data, flush=True):
+        """Write `data`, a contiguous block of whole records, starting at
+           record `start` with a single write.
+        """
+        if len(data) % self.blocksize:
+            raise RecordFileError(
+                "Tried to write data (%d) which " % len(data) +
+                "isn't a multiple of blocksize (%d)." % self.blocksize)
+        self.goto_recnum(start)
+        self.fp.write(data)
+        self._dirty = True
+        self._grown(self.fp.tell())
+        self._written(len(data) // self.blocksize, flush)
+
+    def _filesize(self):
+        "Return the size of the file on disk (without moving the position)."
+        return os.fstat(self.fp.fileno()).st_size
+
+    def _remap(self):
+        """Map the entire file into memory.
+
+           A previous mapping that views still point into is kept open (in
+           ``_old_maps``), so those views remain valid (the file has only
+           grown), until :meth:`_unmap` can close it.
+        """
+        if self.mm is not None:
+            if isinstance(self._view, memoryview):
+                self._view.release()
+            try:
+                self.mm.close()
+            except BufferError:
+                self._old_maps.append(self.mm)
+        size = self._filesize()
+        if size == 0:
+            self.mm, self._view = None, b''
+            return
+        self.mm = mmap.mmap(self.fp.fileno(), size, access=mmap.ACCESS_READ)
+        try:
+            self._view = memoryview(self.mm)
+        except TypeError:  # pragma: no cover
+            # Python 2's mmap doesn't support the new buffer protocol, slices
+            # of the mapping are plain strings.
+            self._view = self.mm
+
+    def _unmap(self):
+        """Close the memory map, and any replaced maps (must be done before
+           the file shrinks, since touching a mapped page beyond the end of
+           the file is fatal).
+        """
+        old_maps, self._old_maps = self._old_maps, []
+        for mm in old_maps:
+            try:
+                mm.close()
+            except BufferError:
+                self._old_maps.append(mm)
+        in_use = bool(self._old_maps)
+        if self.mm is not None:
+            if isinstance(self._view, memoryview):
+                self._view.release()
+            try:
+                self.mm.close()
+            except BufferError:
+                self._view = memoryview(self.mm)
+                in_use = True
+            else:
+                self.mm, self._view = None, b''
+        if in_use:
+            raise RecordFileError(
+                "Can't unmap the file while record views are still in use.")
+
+    def _mapped(self, start, stop):
+        """Return a zero-copy view of bytes `start` through `stop` of the
+           file, growing the mapping if the file has been appended to.
+        """
+        if self._dirty:
+            self.flush()
+        if self.mm is None or stop > len(self.mm):
+            if self._nbytes > (0 if self.mm is None else len(self.mm)):
+                self._remap()
+        return self._view[start:stop]
 
     def _eof(self):
         "Return the position at the end of the file"
@@ -104,36 +419,369 @@ class RecordFile(object):
 
     def __iter__(self):
         "Yield all records."
-        eof = self._eof()
+        eof = self._nbytes
+        if self.use_mmap:
+            self._mapped(0, eof)
+            view = self._view
+            for pos in range(0, eof, self.blocksize):
+                yield view[pos:pos + self.blocksize]
+            return
         self.goto_first_record()
-        while self.fp.tell() < eof:
-            data = self.read()
-            yield data
+        for _pos in range(0, eof, self.blocksize):
+            yield self.read()
+
+    def as_numpy(self, layout, mode=None):
+        """Return a zero-copy ``numpy.memmap`` of the file as an array of
+           records, using the structured dtype of `layout` (a
+           :class:`~fixedrec.layout.Layout` or anything ``numpy.dtype``
+           accepts). Requires numpy.
+
+           `mode` is passed to ``numpy.memmap`` (default: ``'r+'`` if the
+           file is writable, otherwise ``'r'``).
+        """
+        import numpy as np
+        dtype = layout.to_dtype() if hasattr(layout, 'to_dtype') else \
+            np.dtype(layout)
+        if dtype.itemsize != self.blocksize:
+            raise RecordFileError(
+                "Record size (%d) doesn't match blocksize (%d)." % (
+                    dtype.itemsize, self.blocksize))
+        if self._dirty:
+            self.flush()
+        count = self.count()
+        if count == 0:   # numpy can't map an empty file
+            return np.zeros(0, dtype=dtype)
+        if mode is None:
+            mode = 'r' if self.fp.mode == 'rb' else 'r+'
+        return np.memmap(self.fname, dtype=dtype, mode=mode, shape=(count,))
+
+    def write_columns(self, layout, columns, start=-1, flush=False):
+        """Write records built from `columns`, a dict mapping field names of
+           `layout` to equally long sequences (e.g. numpy arrays), starting
+           at record `start` (default: append). Fields without a column are
+           zero-filled.
+
+           The columns are interleaved into buffers of about `bufsize`
+           bytes (with numpy if it is installed), and each buffer is written
+           with a single call. Returns the number of records written.
+           Checksums are filled in if the layout has ``auto_checksum`` set.
+        """
+        if len(layout) != self.blocksize:
+            raise RecordFileError(
+                "Layout length (%d) doesn't match blocksize (%d)." % (
+                    len(layout), self.blocksize))
+        for name in columns:
+            if name not in layout or layout[name].format == 'x':
+                raise RecordFileError("No field named %r in layout." % name)
+        lengths = set(len(col) for col in columns.values())
+        if len(lengths) > 1:
+            raise RecordFileError("Columns have different lengths.")
+        count = lengths.pop() if lengths else 0
+        try:
+            import numpy as np
+            dtype = layout.to_dtype()
+        except ImportError:
+            np = None
+        if np is not None:
+            for name, col in columns.items():
+                self._check_column(np, name, col, dtype.fields[name][0])
+        perbuf = max(1, self.bufsize // self.blocksize)
+        for i in range(0, count, perbuf):
+            j = min(count, i + perbuf)
+            if np is not None:
+                chunk = np.zeros(j - i, dtype=dtype)
+                for name, col in columns.items():
+                    chunk[name] = col[i:j]
+                data = chunk.view(np.uint8)
+            else:
+                chunk = RecordArray(layout, j - i)
+                for name, col in columns.items():
+                    chunk.set_column(name, col[i:j])
+                data = chunk.data
+            if layout.auto_checksum:
+                layout.set_checksums(data)
+            self.write_from(-1 if start == -1 else start + i, data, False)
+        if flush:
+            self.flush()
+        return count
+
+    @staticmethod
+    def _check_column(np, name, col, fieldtype):
+        """Make sure numpy won't silently truncate the values of `col` when
+           they are assigned to a numeric field of type `fieldtype` (struct
+           would raise an error).
+        """
+        if fieldtype.kind not in 'iuf':
+            return
+        values = np.asarray(col)
+        if values.dtype.kind in 'iu' and fieldtype.kind in 'iu':
+            info = np.iinfo(fieldtype)
+            if values.size and (values.min() < info.min or
+                                values.max() > info.max):
+                raise RecordFileError(
+                    "Values of field %r out of range for %s." % (
+                        name, fieldtype))
+        elif not np.can_cast(values.dtype, fieldtype, 'same_kind'):
+            raise RecordFileError("Can't store %s values in field %r (%s)." % (
+                values.dtype, name, fieldtype))
+
+    def write_structured(self, records, layout=None, start=-1, flush=False):
+        """Write the numpy structured array `records` starting at record
+           `start` (default: append), in blocks of about `bufsize` bytes.
+           If `layout` is given and the dtypes differ, the fields are
+           matched by name (see :meth:`write_columns`). Checksums are filled
+           in (in a copy) if `layout` has ``auto_checksum`` set.
+        """
+        import numpy as np
+        if layout is not None and records.dtype != layout.to_dtype():
+            columns = dict((name, records[name])
+                           for name in records.dtype.names)
+            return self.write_columns(layout, columns, start, flush)
+        if records.dtype.itemsize != self.blocksize:
+            raise RecordFileError(
+                "Record size (%d) doesn't match blocksize (%d)." % (
+                    records.dtype.itemsize, self.blocksize))
+        data = np.ascontiguousarray(records).view(np.uint8)
+        step = max(1, self.bufsize // self.blocksize) * self.blocksize
+        for pos in range(0, len(data), step):
+            recnum = -1 if start == -1 else start + pos // self.blocksize
+            block = data[pos:pos + step]
+            if layout is not None and layout.auto_checksum:
+                block = block.copy()
+                layout.set_checksums(block)
+            self.write_from(recnum, block, False)
+        if flush:
+            self.flush()
+        return len(records)
+
+    def _chunks(self, chunksize=DEFAULT_CHUNKSIZE, recycle=False, start=0):
+        """Yield ``(recnum, data)`` pairs, where `data` is a memoryview of
+           the whole records starting at record `recnum`, reading about
+           `chunksize` bytes at a time. If `recycle` is true, the same buffer
+           is filled for every chunk.
+        """
+        bs = self.blocksize
+        perchunk = max(1, chunksize // bs)
+        end = self.count()
+        buf = None
+        recnum = start
+        while recnum < end:
+            n = min(perchunk, end - recnum)
+            if self.use_mmap:
+                pos = recnum * bs
+                data = self._mapped(pos, pos + n * bs)
+            else:
+                if buf is None or not recycle:
+                    buf = bytearray(perchunk * bs)
+                n = self.read_into(recnum, memoryview(buf)[:n * bs])
+                if n == 0:
+                    return
+                data = memoryview(buf)[:n * bs]
+            yield recnum, data
+            recnum += n
+
+    def readahead(self, chunksize=DEFAULT_CHUNKSIZE, recycle=False, start=0):
+        """Yield all (whole) records from record `start`, reading `chunksize`
+           bytes at a time.
+
+           The records are memoryviews into the chunk they were read from.
+           If `recycle` is true one buffer is reused for every chunk, so a
+           record is only valid until the iterator moves past its chunk
+           (use ``.tobytes()`` to keep it).
+        """
+        bs = self.blocksize
+        for _recnum, data in self._chunks(chunksize, recycle, start):
+            for pos in range(0, len(data), bs):
+                yield data[pos:pos + bs]
+
+    def prefetch(self, chunksize=DEFAULT_CHUNKSIZE, depth=2, recycle=False,
+                 start=0):
+        """Like :meth:`readahead`, but the chunks are read by a background
+           thread (with its own file handle) that stays up to `depth` chunks
+           ahead of the consumer, so I/O overlaps with record processing.
+           If `recycle` is true, a fixed pool of buffers is reused.
+        """
+        if self._dirty:
+            self.flush()
+        bs = self.blocksize
+        perchunk = max(1, chunksize // bs)
+        full = queue.Queue(depth)
+        free = None
+        if recycle:
+            free = queue.Queue()
+            for _i in range(depth + 2):
+                free.put(bytearray(perchunk * bs))
+        stop = threading.Event()
+        reader = threading.Thread(
+            target=self._prefetcher,
+            args=(start, self.count(), perchunk, full, free, stop))
+        reader.daemon = True
+        reader.start()
+        prev = None
+        try:
+            while True:
+                item = full.get()
+                if prev is not None:
+                    free.put(prev)
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                buf, n = item
+                data = memoryview(buf)
+                for pos in range(0, n * bs, bs):
+                    yield data[pos:pos + bs]
+                if recycle:
+                    prev = buf
+        finally:
+            stop.set()
+            reader.join()
+
+    def _prefetcher(self, recnum, end, perchunk, full, free, stop):
+        "Background reader for :meth:`prefetch`."
+        bs = self.blocksize
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    return full.put(item, timeout=0.05)
+                except queue.Full:
+                    pass
+
+        try:
+            with open(self.fname, 'rb') as fp:
+                fp.seek(recnum * bs, 0)
+                while recnum < end and not stop.is_set():
+                    n = min(perchunk, end - recnum)
+                    buf = bytearray(perchunk * bs) if free is None else None
+                    while buf is None and not stop.is_set():
+                        try:
+                            buf = free.get(timeout=0.05)
+                        except queue.Empty:
+                            pass
+                    if buf is None:
+                        return
+                    n = (fp.readinto(memoryview(buf)[:n * bs]) or 0) // bs
+                    if n == 0:
+                        break
+                    put((buf, n))
+                    recnum += n
+            put(None)
+        except Exception as e:
+            put(e)
+
+    def scan(self, layout, fields=None, chunksize=DEFAULT_CHUNKSIZE, start=0):
+        """Yield a tuple with the values of `fields` (default: all named
+           fields of `layout`) for each record, from record `start`.
+
+           Only the requested fields are decoded, using a pre-compiled
+           struct that skips all other bytes (see
+           :meth:`~fixedrec.layout.Layout.projection`). String fields are
+           not stripped.
+        """
+        if fields is None:
+            fields = [f.name for f in layout.fields
+                      if f.name and f.format != 'x']
+        fields = list(fields)
+        for name in fields:
+            field = layout[name]
+            if field.format == 'x' or (field.count > 1 and
+                                       field.format not in 'sp'):
+                raise RecordFileError("Can't scan field %r." % name)
+        ordered = sorted(fields, key=lambda name: layout[name].position)
+        reorder = None
+        if ordered != fields:
+            reorder = [ordered.index(name) for name in fields]
+        width = len(fields)
+        for _recnum, data in self._chunks(chunksize, True, start):
+            values = iter(layout.project(data, ordered))
+            for rec in zip(*[values] * width):
+                if reorder is not None:
+                    rec = tuple([rec[i] for i in reorder])
+                yield rec
 
     def __len__(self):
         "Returns the number of records in the file."
         return self.count()
 
+    def _slice_range(self, s, default_stop):
+        "Return (start, stop) of the contiguous slice `s`."
+        if s.step not in (None, 1):
+            raise RecordFileError("Only contiguous slices are supported.")
+        start = 0 if s.start is None else s.start
+        stop = default_stop if s.stop is None else s.stop
+        if start < 0 or (stop is not None and stop < 0):
+            length = len(self)
+            # like list slicing, indexes before the first record mean 0
+            if start < 0:
+                start = max(0, start + length)
+            if stop is not None and stop < 0:
+                stop = max(0, stop + length)
+        return start, stop
+
     def __getitem__(self, n):
-        "Get record number `n`."
+        """Get record number `n`, or a list of records if `n` is a slice.
+        """
+        if isinstance(n, slice):
+            start, stop = self._slice_range(n, len(self))
+            stop = min(stop, len(self))
+            return self.read_many(start, max(0, stop - start))
+        if self.use_mmap and n >= 0:
+            pos = n * self.blocksize
+            return self._mapped(pos, pos + self.blocksize)
+        if self.positional and n >= 0:
+            return self._read_at(n * self.blocksize, self.blocksize)
         self.goto_recnum(n)
         return self.read()
 
     def __setitem__(self, n, data):
-        "Set record number `n`."
-        self.goto_recnum(n)
-        data = data if isinstance(data, list) else [data]
-        for rec in data:
-            self.write(rec)
+        """Set record number `n`. If `data` is a list, the records are written
+           contiguously starting at `n` (with a single write).
+           Slice assignment (``rf[a:b] = [...]``) must not change the number
+           of records in the slice.
+        """
+        if isinstance(n, slice):
+            start, stop = self._slice_range(n, None)
+            if stop is not None and stop - start != len(data):
+                raise RecordFileError(
+                    "Slice assignment can't change the number of records.")
+            n = start
+        if not isinstance(data, list):
+            if self.positional:
+                data = self._serialize(data)
+                self._check_blocksize(data)
+                return self._write_at(n, data)
+            self.goto_recnum(n)
+            return self.write(data)
+        if self.positional:
+            return self._write_at(n, self._pack(data))
+        self.write_from(n, self._pack(data))
+
+    def _pack(self, records):
+        "Pack `records` into one contiguous buffer."
+        bs = self.blocksize
+        buf = bytearray(len(records) * bs)
+        for i, rec in enumerate(records):
+            rec = self._serialize(rec)
+            self._check_blocksize(rec)
+            buf[i * bs:(i + 1) * bs] = rec
+        return buf
 
     def swap(self, a, b):
         "Swap records at positions `a` and `b`."
-        self[a], self[b] = self[b], self[a]
+        reca, recb = self._copy(self[a]), self._copy(self[b])
+        self[a], self[b] = recb, reca
+
+    @staticmethod
+    def _copy(rec):
+        "Detach `rec` from the buffer it is a view of."
+        return rec.tobytes() if isinstance(rec, memoryview) else rec
 
     def __delitem__(self, n):
         """Move record to the end of the file, then truncate the file.
         """
         length = len(self) - 1
+        self._unmap()       # refuse before swapping if views are in use
         self.swap(n, length)
         self.truncate(length)
 
@@ -173,6 +821,14 @@ class RecordFile(object):
 
     def close(self):
         "Close file and write statusrec."
+        if self.fp.closed:
+            return
+        self.policy.close(self)
+        try:
+            self._unmap()
+        except RecordFileError:
+            # views still in use keep the mapping alive until released.
+            self.mm, self._view, self._old_maps = None, b'', []
         self.fp.flush()
         self.fp.close()
 
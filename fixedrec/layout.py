@@ -4,10 +4,29 @@
    figure out size and position of fields.
 """
 import re
-import struct
+from collections import namedtuple
 from struct import Struct
+from .checksums import checksum_function, data_range
+from .record import _SlottedRecord, FieldAccessor
+from .record import DirtyingFieldAccessor
+from .record import ChecksumAccessor
 from .utils import split_fields
 
+#: native-only struct codes, and the standard size codes used for them (with
+#: the sizes in :attr:`Layout.struct_field_sizes`).
+native_only_formats = {
+    'P': 'I',
+    'n': 'q',
+    'N': 'I',
+}
+
+
+def standard_format(fmt):
+    """Return the struct format `fmt` (without prefix) with native-only codes
+       replaced, so that it can be used with a standard size prefix.
+    """
+    return ''.join(native_only_formats.get(ch, ch) for ch in fmt)
+
 
 class Field(object):
     """Representation of a field defined in a `struct` format string.
@@ -24,26 +43,33 @@ class Field(object):
         self.format = 'x'
         self.type = ""
         self.size = 0
+        # byte order prefix used when packing/unpacking the field
+        self.prefix = '='
         # should padding bytes be stripped when pretty printing
         self.strip = None
         
         self.__dict__.update(kw)
         if self.strip is None:
             self.strip = self.format == 's'
+        #: pre-compiled struct for this field.
+        self.struct = Struct(self.prefix + standard_format(self.layout))
+        self._unpack_from = self.struct.unpack_from
+        self._pack_into = self.struct.pack_into
+        self._rstrip = self.format == 's' and self.strip
 
-    def get_value(self, data):
-        "Get this field's value from `data`."
-        rec = struct.unpack_from(
-            '=' + self.layout,
-            str(data), self.position
-        )
-        if self.format == 's' and self.strip:
-            return rec[0].rstrip('\0')
-        return rec[0]
+    def get_value(self, data, offset=0):
+        """Get this field's value from the record starting at `offset` in
+           `data` (any object supporting the buffer protocol, it is not
+           copied).
+        """
+        val = self._unpack_from(data, offset + self.position)[0]
+        if self._rstrip:
+            return val.rstrip(b'\0')
+        return val
 
-    def set_value(self, data, value):
-        "Set this field to `value` in `data`."
-        struct.pack_into('=' + self.layout, data, self.position, value)
+    def set_value(self, data, value, offset=0):
+        "Set this field to `value` in the record at `offset` in `data`."
+        self._pack_into(data, offset + self.position, value)
         return value
 
     def __repr__(self):
@@ -85,6 +111,10 @@ class Layout(object):
                 name="Record"
             )
 
+       Pass ``checksum='crc32'`` (or any name registered in
+       :mod:`fixedrec.checksums`) to enable :meth:`set_checksum` and
+       :meth:`verify_checksum`, the checksum is stored in the field named
+       by ``checksum_field`` (default ``'chksum'``).
 
     """
     #: types corresponding to struct character codes
@@ -135,6 +165,37 @@ class Layout(object):
         'P': 4,
     }
 
+    #: numpy type codes corresponding to struct character codes (with the
+    #: sizes from :attr:`struct_field_sizes`).
+    numpy_types = {
+        'c': 'S1',
+        'b': 'i1',
+        'B': 'u1',
+        '?': '?',
+        'h': 'i2',
+        'H': 'u2',
+        'i': 'i4',
+        'I': 'u4',
+        'l': 'i4',
+        'L': 'u4',
+        'q': 'i8',
+        'Q': 'u8',
+        'n': 'i8',
+        'N': 'u4',
+        'f': 'f4',
+        'd': 'f8',
+        'P': 'u4',
+    }
+
+    #: numpy byte order characters corresponding to record prefixes.
+    numpy_byteorder = {
+        '@': '=',
+        '=': '=',
+        '<': '<',
+        '>': '>',
+        '!': '>',
+    }
+
     #: legal struct format string record prefixes
     record_prefix = {
         '@': "native aligned",
@@ -152,6 +213,11 @@ class Layout(object):
 
     def __init__(self, layout, *names, **kw):
         self.name = kw.get('name')
+        #: name of the checksum algorithm (None: no checksum)
+        self.checksum = kw.get('checksum')
+        self.checksum_field = kw.get('checksum_field', 'chksum')
+        #: fill in the checksum lazily when a record is serialized
+        self.auto_checksum = kw.get('auto_checksum', False)
         self.names = names
         self.layout = layout
         self.struct = Struct(layout)
@@ -162,6 +228,9 @@ class Layout(object):
             layout = layout[1:]
         else:
             prefix = '@'
+        # field positions are calculated using standard sizes without
+        # alignment, which for native byte order is what '=' means.
+        fieldprefix = '=' if prefix == '@' else prefix
         fields = []        # get field by position
         self._field = {}   # get field by name
         pos = 0
@@ -176,14 +245,43 @@ class Layout(object):
                 format=fmtch,
                 type=self.struct_field_types[fmtch],
                 size=max(1, count) * self.struct_field_sizes[fmtch],
-                position=pos
+                position=pos,
+                prefix=fieldprefix
             )
             pos += len(f)
             fields.append(f)
             if f.name:
                 self._field[f.name] = f
         self.prefix = prefix
+        self.fieldprefix = fieldprefix
         self.fields = fields
+        self._projections = {}
+        if self.checksum is not None:
+            try:
+                self._checksum_fn = checksum_function(self.checksum)
+            except KeyError:
+                raise ValueError("Unknown checksum: %r" % self.checksum)
+            if self.checksum_field not in self._field:
+                raise ValueError(
+                    "No checksum field named %r" % self.checksum_field)
+        elif self.auto_checksum:
+            raise ValueError("auto_checksum needs a checksum algorithm.")
+        #: struct for the whole record (consistent with the field positions).
+        self.record_struct = Struct(fieldprefix + standard_format(layout))
+        #: namedtuple type returned by :meth:`unpack` (None if the values
+        #: can't be mapped one-to-one to named fields).
+        self.tuple_type = None
+        valuefields = [f for f in fields if f.format != 'x']
+        if names and all(f.count <= 1 or f.format in 'sp'
+                         for f in valuefields):
+            fieldnames = [str(f.name) for f in valuefields]
+            try:
+                self.tuple_type = namedtuple(
+                    str(self.name or 'Record'), fieldnames, rename=True)
+            except ValueError:
+                # the name is for display, it needn't be an identifier
+                self.tuple_type = namedtuple('Record', fieldnames,
+                                             rename=True)
 
     def __getitem__(self, key):
         """Get field `key`, where key is either the position of the field
@@ -217,6 +315,155 @@ class Layout(object):
             res += '    @%4d:' % f.position + str(f) + '\n'
         return res
 
+    def project(self, buf, names, batch=1024):
+        """Return a flat list of the values of fields `names` (in field
+           order) of all whole records in `buf`, decoding `batch` records
+           per struct call (see :meth:`projection`).
+        """
+        reclen = len(self)
+        n = len(buf) // reclen
+        full = n - n % batch
+        values = []
+        if full:
+            unpack_from = self.projection(names, batch).unpack_from
+            for pos in range(0, full * reclen, batch * reclen):
+                values.extend(unpack_from(buf, pos))
+        if full < n:
+            rest = self.projection(names, n - full)
+            values.extend(rest.unpack_from(buf, full * reclen))
+        return values
+
+    def compute_checksum(self, buf, offset=0):
+        """Return the checksum of the record at `offset` in `buf`, i.e. of
+           all bytes preceding the checksum field (truncated to the size of
+           the field).
+        """
+        if self.checksum is None:
+            raise ValueError("Layout %r has no checksum." % self.name)
+        field = self._field[self.checksum_field]
+        data = data_range(buf, offset, offset + field.position)
+        return self._checksum_fn(data) & ((1 << (8 * field.size)) - 1)
+
+    def set_checksum(self, buf, offset=0):
+        "Compute and store the checksum of the record at `offset` in `buf`."
+        return self._field[self.checksum_field].set_value(
+            buf, self.compute_checksum(buf, offset), offset)
+
+    def set_checksums(self, buf):
+        "Compute and store the checksums of all (whole) records in `buf`."
+        reclen = len(self)
+        for offset in range(0, len(buf) - reclen + 1, reclen):
+            self.set_checksum(buf, offset)
+
+    def verify_checksum(self, buf, offset=0):
+        "Does the stored checksum of the record at `offset` in `buf` match?"
+        stored = self._field[self.checksum_field].get_value(buf, offset)
+        return stored == self.compute_checksum(buf, offset)
+
+    def unpack(self, buf, offset=0, named=True):
+        """Decode all fields of the record at `offset` in `buf` with a single
+           struct call. Returns a namedtuple (if `named` and the layout has
+           field names) or a tuple. Padding (``x``) fields have no value,
+           and string fields are not stripped.
+        """
+        values = self.record_struct.unpack_from(buf, offset)
+        if named and self.tuple_type is not None:
+            return self.tuple_type._make(values)
+        return values
+
+    def pack(self, values):
+        """Encode `values` (in the order returned by :meth:`unpack`) to the
+           bytes of a record.
+        """
+        return self.record_struct.pack(*values)
+
+    def pack_into(self, buf, offset, values):
+        "Encode `values` into `buf` at `offset` (see :meth:`pack`)."
+        self.record_struct.pack_into(buf, offset, *values)
+
+    def projection(self, names, count=1):
+        """Return a `Struct` that decodes only the fields `names` from
+           `count` consecutive records (all other bytes are skipped as
+           padding). The values come out in field order, record by record.
+        """
+        key = (tuple(names), count)
+        if key not in self._projections:
+            fields = sorted((self[name] for name in names),
+                            key=lambda f: f.position)
+            fmt = []
+            pos = 0
+            for f in fields:
+                fmt.append('%dx%s' % (f.position - pos, f.layout))
+                pos = f.position + f.size
+            fmt.append('%dx' % (len(self) - pos))
+            self._projections[key] = Struct(
+                self.fieldprefix + standard_format(''.join(fmt)) * count)
+        return self._projections[key]
+
+    def to_dtype(self):
+        """Return a numpy structured dtype matching this layout (requires
+           numpy). Padding (``x``) fields are left out, unnamed fields are
+           called ``f<index>``.
+        """
+        import numpy as np
+        byteorder = self.numpy_byteorder[self.prefix]
+        names, formats, offsets = [], [], []
+        for f in self.fields:
+            if f.format == 'x':
+                continue
+            if f.format in 'sp':
+                fmt = 'S%d' % max(1, f.count)
+            elif f.count > 1:
+                fmt = (byteorder + self.numpy_types[f.format], (f.count,))
+            else:
+                fmt = byteorder + self.numpy_types[f.format]
+            names.append(str(f.name or 'f%d' % f.index))
+            formats.append(fmt)
+            offsets.append(f.position)
+        return np.dtype({
+            'names': names,
+            'formats': formats,
+            'offsets': offsets,
+            'itemsize': len(self),
+        })
+
+    def make_record_class(self, name=None):
+        """Return a new record class for this layout (with the methods of
+           :class:`~fixedrec.record.Record`), with ``__slots__`` and one data
+           descriptor per named field (so attribute access doesn't go through
+           ``__getattr__``).
+
+           Usage::
+
+               StatusRecord = status_layout.make_record_class()
+               rec = StatusRecord(data)
+               rec.version = '1.0.1'
+
+        """
+        layout = self
+
+        def __init__(self, data=None, **kw):
+            _SlottedRecord.__init__(self, layout, data, **kw)
+
+        namespace = {
+            '__slots__': (),
+            '__init__': __init__,
+            '__setattr__': object.__setattr__,
+            'layout': self,
+        }
+        accessor = FieldAccessor
+        if self.auto_checksum:
+            accessor = DirtyingFieldAccessor
+        for f in self.fields:
+            if not f.name:
+                continue
+            if self.auto_checksum and f.name == self.checksum_field:
+                namespace[f.name] = ChecksumAccessor(f)
+            else:
+                namespace[f.name] = accessor(f)
+        return type(str(name or self.name or 'Record'), (_SlottedRecord,),
+                    namespace)
+
     def split(self, data):
         """Split the byte string `data` into a list of substrings holding the
            data for each field.
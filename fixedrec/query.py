@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""Lazy, streaming queries over the records in a
+   :class:`~fixedrec.fixedrec.RecordFile`.
+
+   Usage::
+
+       q = Query(rf, layout).where('rectype', '==', 'usr')
+       q = q.where('timestamp', '>=', t0).select('key', 'timestamp')
+       for key, timestamp in q.limit(10):
+           ...
+
+   Predicates are evaluated against the raw bytes of each record, at the
+   field's position, before anything else is decoded (equality on string,
+   char and integer fields compares the bytes directly). Only matching
+   records are turned into :class:`~fixedrec.record.Record` objects (or
+   tuples of the selected fields, with string fields stripped of their NUL
+   padding, as record attributes are). The file is read in chunks, so a query
+   runs in constant memory.
+"""
+import operator
+import struct
+from itertools import islice
+from .fixedrec import DEFAULT_CHUNKSIZE
+from .record import Record
+
+
+class Query(object):
+    """An immutable query, :meth:`where`, :meth:`select`, and :meth:`limit`
+       return new queries. Iterate over it to run it.
+    """
+    #: operators that can be used in :meth:`where`.
+    operators = {
+        '==': operator.eq,
+        '!=': operator.ne,
+        '<': operator.lt,
+        '<=': operator.le,
+        '>': operator.gt,
+        '>=': operator.ge,
+        'in': lambda val, values: val in values,
+    }
+
+    def __init__(self, rf, layout, chunksize=DEFAULT_CHUNKSIZE):
+        if rf.blocksize != len(layout):
+            raise ValueError("Block size (%d) doesn't match layout (%d)" % (
+                rf.blocksize, len(layout)))
+        self.rf = rf
+        self.layout = layout
+        self.chunksize = chunksize
+        self.predicates = ()
+        self.fields = None
+        self.count = None
+
+    def _copy(self, **kw):
+        q = Query.__new__(Query)
+        q.__dict__.update(self.__dict__)
+        q.__dict__.update(kw)
+        return q
+
+    def where(self, field, op, value):
+        "Only records where `field` `op` `value` holds (e.g. '>=')."
+        if op not in self.operators:
+            raise ValueError("Unknown operator: %r" % op)
+        self._check_field(field)
+        return self._copy(predicates=self.predicates + ((field, op, value),))
+
+    def select(self, *fields):
+        "Yield tuples of the values of `fields` instead of records."
+        for field in fields:
+            self._check_field(field)
+        return self._copy(fields=fields)
+
+    def limit(self, n):
+        "Stop after `n` results."
+        if self.count is not None:
+            n = min(n, self.count)
+        return self._copy(count=n)
+
+    def _check_field(self, name):
+        if name not in self.layout or self.layout[name].format == 'x':
+            raise ValueError("No field named %r in layout." % name)
+        field = self.layout[name]
+        if field.count > 1 and field.format not in 'sp':
+            raise ValueError("Can't query repeated field %r." % name)
+
+    def _test(self, field, op, value):
+        """Return a function(buf, offset) that evaluates one predicate on the
+           record at `offset` in `buf`.
+        """
+        field = self.layout[field]
+        pos, end = field.position, field.position + field.size
+        rawstr = field.format == 's' and field.strip
+        rawint = field.format in 'cbBhHiIlLqQnN'
+        if op in ('==', '!=') and (rawstr or rawint):
+            if rawstr:
+                raw = value + b'\0' * (field.size - len(value))
+                if len(raw) != field.size:
+                    raw = None                  # can never be equal
+            else:
+                try:
+                    raw = field.struct.pack(value)
+                except struct.error:
+                    raw = None
+            if op == '==':
+                return lambda buf, ofs: buf[ofs + pos:ofs + end] == raw
+            return lambda buf, ofs: buf[ofs + pos:ofs + end] != raw
+
+        get_value = field.get_value
+        compare = self.operators[op]
+        return lambda buf, offset: compare(get_value(buf, offset), value)
+
+    def _matches(self):
+        "Yield ``(buf, offset)`` for each matching record."
+        tests = [self._test(*p) for p in self.predicates]
+        reclen = len(self.layout)
+        for _recnum, data in self.rf._chunks(self.chunksize, True):
+            for offset in range(0, len(data), reclen):
+                for test in tests:
+                    if not test(data, offset):
+                        break
+                else:
+                    yield data, offset
+
+    def _results(self):
+        reclen = len(self.layout)
+        if self.fields is None:
+            for data, offset in self._matches():
+                yield Record(self.layout, data[offset:offset + reclen])
+            return
+        ordered = sorted(self.fields,
+                         key=lambda name: self.layout[name].position)
+        unpack_from = self.layout.projection(ordered, 1).unpack_from
+        reorder = [ordered.index(name) for name in self.fields]
+        # string fields are stripped of NUL padding, like Record attributes
+        strip = [self.layout[name]._rstrip for name in self.fields]
+        for data, offset in self._matches():
+            values = unpack_from(data, offset)
+            yield tuple([values[i].rstrip(b'\0') if s else values[i]
+                         for i, s in zip(reorder, strip)])
+
+    def __iter__(self):
+        if self.count is None:
+            return self._results()
+        return islice(self._results(), self.count)
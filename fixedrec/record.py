@@ -1,46 +1,13 @@
 from .utils import n_, pset
 
 
-class Record(object):
-    """Record base class, providing attribute access and pretty printing.
-
-       Usage::
-       
-            @register_record
-            class StatusRecord(Record):
-                RECTYPE = 'ver'
-                layout = Layout(
-                    '=4sQ10sH12xHcc',
-                    'rectype',
-                    'timestamp',
-                    'version',
-                    'reclen',
-                    'pad'
-                    'chksum',
-                    'cr',
-                    'nl',
-                    name="StatusRecord"
-                )
-
-                def __init__(self, data=None, **kw):
-                    super(StatusRecord, self).__init__(
-                        StatusRecord.layout, data, **kw
-                    )
-                    if data is None:
-                        self.rectype = StatusRecord.RECTYPE
-                        self.version = '1.0.0'
-                        self.reclen = len(StatusRecord.layout)
-                        self.cr = b'\\r'
-                        self.nl = b'\\n'
-                    self.set_checksum()
-                
-                def set_checksum(self):
-                    # checksum of all preceeding fields.
-                    cksm_field = self._layout['chksum']
-                    cksm = utils.bsd_checksum(self._data[:cksm_field.position])
-                    cksm_field.set_value(self._data, cksm)
-
+class _SlottedRecord(object):
+    """The implementation of :class:`Record`, without an instance
+       ``__dict__`` (the base of the classes created by
+       :meth:`fixedrec.layout.Layout.make_record_class`).
     """
+    __slots__ = ('_layout', '_data', '_dirty', '__weakref__')
+
     def __init__(self, layout, data=None, **kw):
         """`layout` should be a :class:`Layout` object.
            `data` should be raw data read from file.
@@ -48,6 +15,8 @@ class Record(object):
         """
         self._layout = layout
         self._data = bytearray(data if data is not None else len(self._layout))
+        # does the checksum need to be recomputed (auto_checksum layouts)?
+        self._dirty = data is None and layout.auto_checksum
 
         # set individual fields
         for k, v in kw.items():
@@ -63,8 +32,10 @@ class Record(object):
            takes precedence over field names.
         """
         try:
-            return super(Record, self).__getattr__(attr)
+            return super(_SlottedRecord, self).__getattr__(attr)
         except AttributeError:
+            if attr == self._layout.checksum_field and self._dirty:
+                self._finalize()
             return self._layout[attr].get_value(self._data)
 
     def __setattr__(self, attr, val):
@@ -72,14 +43,47 @@ class Record(object):
            to conflict with any field names.
         """
         if attr.startswith('_') or attr not in self._layout:
-            return super(Record, self).__setattr__(attr, val)
+            return super(_SlottedRecord, self).__setattr__(attr, val)
 
         self._layout[attr].set_value(self._data, val)
+        if self._layout.auto_checksum and attr != self._layout.checksum_field:
+            self._dirty = True
         return val
 
+    def _finalize(self):
+        "Fill in the checksum if fields have changed (auto_checksum)."
+        if self._dirty:
+            self._layout.set_checksum(self._data)
+            self._dirty = False
+
+    def tobytes(self):
+        "Return the record's data (with an up-to-date checksum)."
+        self._finalize()
+        return bytes(self._data)
+
+    def unpack(self, named=True):
+        """Return the values of all fields, decoded with a single struct call
+           (see :meth:`fixedrec.layout.Layout.unpack`).
+        """
+        self._finalize()
+        return self._layout.unpack(self._data, 0, named)
+
+    def set_checksum(self):
+        """Compute and store the checksum, using the layout's checksum
+           algorithm (see :mod:`fixedrec.checksums`).
+        """
+        self._dirty = False
+        return self._layout.set_checksum(self._data)
+
+    def verify(self):
+        "Does the stored checksum match the data?"
+        self._finalize()
+        return self._layout.verify_checksum(self._data)
+
     def parts(self):
         """Return data for each field of the layout.
         """
+        self._finalize()
         return self._layout.split(str(self._data))
 
     def pretty_parts(self):
@@ -105,3 +109,178 @@ class Record(object):
         """
         parts = self._layout.split(str(self._data))
         return pset(zip(self._layout.names, self.pretty_parts()))
+
+
+class Record(_SlottedRecord):
+    """Record base class, providing attribute access and pretty printing.
+
+       Usage::
+       
+            @register_record
+            class StatusRecord(Record):
+                RECTYPE = 'ver'
+                layout = Layout(
+                    '=4sQ10sH12xHcc',
+                    'rectype',
+                    'timestamp',
+                    'version',
+                    'reclen',
+                    'pad'
+                    'chksum',
+                    'cr',
+                    'nl',
+                    name="StatusRecord"
+                )
+
+                def __init__(self, data=None, **kw):
+                    super(StatusRecord, self).__init__(
+                        StatusRecord.layout, data, **kw
+                    )
+                    if data is None:
+                        self.rectype = StatusRecord.RECTYPE
+                        self.version = '1.0.0'
+                        self.reclen = len(StatusRecord.layout)
+                        self.cr = b'\\r'
+                        self.nl = b'\\n'
+                    self.set_checksum()
+                
+                def set_checksum(self):
+                    # checksum of all preceeding fields.
+                    cksm_field = self._layout['chksum']
+                    cksm = utils.bsd_checksum(self._data[:cksm_field.position])
+                    cksm_field.set_value(self._data, cksm)
+
+       The hand-written ``set_checksum`` isn't needed if the layout names a
+       checksum algorithm (``Layout(..., checksum='bsd')``), the
+       :meth:`set_checksum` and :meth:`verify` methods then use it.
+       With ``Layout(..., checksum='bsd', auto_checksum=True)`` the checksum
+       is filled in lazily, once, when the record's bytes are needed (by
+       :meth:`tobytes`, when it is written to a
+       :class:`~fixedrec.fixedrec.RecordFile`, or when the checksum field
+       is read) after any field has changed.
+
+       :meth:`fixedrec.layout.Layout.make_record_class` creates record
+       classes with faster attribute access (and no instance ``__dict__``).
+
+    """
+
+
+class RecordView(object):
+    """Field access to a record stored at `offset` in `buffer` (e.g. a chunk
+       or memory map returned by :class:`~fixedrec.fixedrec.RecordFile`),
+       without copying the data.
+
+       Usage::
+
+           view = RecordView(layout, chunk)
+           for offset in range(0, len(chunk), len(layout)):
+               view.rebind(offset)
+               total += view.amount
+
+    """
+    __slots__ = ('_layout', '_buffer', '_offset')
+
+    def __init__(self, layout, buffer, offset=0):
+        self._layout = layout
+        self._buffer = buffer
+        self._offset = offset
+
+    def rebind(self, offset, buffer=None):
+        """Point the view at the record at `offset` (in `buffer` if given).
+           Returns the view.
+        """
+        self._offset = offset
+        if buffer is not None:
+            self._buffer = buffer
+        return self
+
+    def __len__(self):
+        return len(self._layout)
+
+    def __getattr__(self, attr):
+        try:
+            field = self._layout[attr]
+        except KeyError:
+            raise AttributeError(attr)
+        return field.get_value(self._buffer, self._offset)
+
+    def __setattr__(self, attr, val):
+        if attr.startswith('_') or attr not in self._layout:
+            return super(RecordView, self).__setattr__(attr, val)
+        self._layout[attr].set_value(self._buffer, val, self._offset)
+        if self._layout.auto_checksum and attr != self._layout.checksum_field:
+            # a view has nowhere to keep a dirty flag, update it right away
+            self._layout.set_checksum(self._buffer, self._offset)
+
+    def unpack(self, named=True):
+        "Return the values of all fields (see :meth:`Record.unpack`)."
+        return self._layout.unpack(self._buffer, self._offset, named)
+
+    def set_checksum(self):
+        "Compute and store the checksum (see :meth:`Record.set_checksum`)."
+        return self._layout.set_checksum(self._buffer, self._offset)
+
+    def verify(self):
+        "Does the stored checksum match the data?"
+        return self._layout.verify_checksum(self._buffer, self._offset)
+
+    def tobytes(self):
+        "Return a copy of the record's data."
+        end = self._offset + len(self._layout)
+        return bytes(bytearray(self._buffer[self._offset:end]))
+
+    def record(self):
+        "Return a :class:`Record` holding a copy of the data."
+        return Record(self._layout, self.tobytes())
+
+    def __repr__(self):
+        return '<RecordView @%d %r>' % (self._offset, self.record())
+
+
+class FieldAccessor(object):
+    """Data descriptor giving attribute access to one field of a record
+       (used by :meth:`fixedrec.layout.Layout.make_record_class`).
+    """
+    __slots__ = ('name', 'position', 'unpack_from', 'pack_into', 'rstrip')
+
+    def __init__(self, field):
+        self.name = field.name
+        self.position = field.position
+        self.unpack_from = field.struct.unpack_from
+        self.pack_into = field.struct.pack_into
+        self.rstrip = field.format == 's' and field.strip
+
+    def __get__(self, rec, cls):
+        if rec is None:
+            return self
+        val = self.unpack_from(rec._data, self.position)[0]
+        if self.rstrip:
+            return val.rstrip(b'\0')
+        return val
+
+    def __set__(self, rec, value):
+        self.pack_into(rec._data, self.position, value)
+
+
+class DirtyingFieldAccessor(FieldAccessor):
+    """Field accessor for auto_checksum layouts, marking the record dirty
+       when the field is set.
+    """
+    __slots__ = ()
+
+    def __set__(self, rec, value):
+        self.pack_into(rec._data, self.position, value)
+        rec._dirty = True
+
+
+class ChecksumAccessor(FieldAccessor):
+    """Accessor for the checksum field of auto_checksum layouts, filling in
+       the checksum before it is read.
+    """
+    __slots__ = ()
+
+    def __get__(self, rec, cls):
+        if rec is None:
+            return self
+        rec._finalize()
+        return FieldAccessor.__get__(self, rec, cls)
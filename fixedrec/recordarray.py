@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""Contiguous in-memory arrays of fixed size records.
+"""
+import array
+from .record import RecordView, _SlottedRecord
+
+
+def _typecode(code, fallback):
+    try:
+        array.array(code)
+        return code
+    except ValueError:  # pragma: no cover
+        return fallback   # Python 2 has no 'q'/'Q' arrays
+
+
+#: `array` type codes for numeric struct field formats (other fields are
+#: returned as lists).
+array_typecodes = {
+    'b': 'b',
+    'B': 'B',
+    '?': 'B',
+    'h': 'h',
+    'H': 'H',
+    'i': 'i',
+    'I': 'I',
+    'l': 'l',
+    'L': 'L',
+    'q': _typecode('q', 'l'),
+    'Q': _typecode('Q', 'L'),
+    'n': _typecode('q', 'l'),
+    'N': _typecode('Q', 'L'),
+    'P': _typecode('Q', 'L'),
+    'f': 'f',
+    'd': 'd',
+}
+
+
+class RecordArray(object):
+    """`n` records of `layout` stored in one contiguous `bytearray`.
+
+       Usage::
+
+           arr = RecordArray.load(rf, layout)
+           timestamps = arr.column('timestamp')
+           arr[0].key = 'hello'
+           arr.save(rf)
+
+    """
+    #: number of records decoded per struct call by :meth:`column`.
+    batch = 1024
+
+    def __init__(self, layout, n, data=None):
+        self.layout = layout
+        self.reclen = len(layout)
+        if data is None:
+            data = bytearray(n * self.reclen)
+        elif len(data) != n * self.reclen:
+            raise ValueError(
+                "Data (%d) doesn't match %d records of %d bytes" % (
+                    len(data), n, self.reclen))
+        self.data = data
+
+    def __len__(self):
+        return len(self.data) // self.reclen
+
+    def _offset(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("record index out of range")
+        return i * self.reclen
+
+    def __getitem__(self, i):
+        "Return a :class:`RecordView` of record `i` (no data is copied)."
+        return RecordView(self.layout, self.data, self._offset(i))
+
+    def __setitem__(self, i, rec):
+        "Copy `rec` (a :class:`Record` or the bytes of one) into record `i`."
+        if isinstance(rec, _SlottedRecord):
+            rec = rec.tobytes()
+        if len(rec) != self.reclen:
+            raise ValueError("Record length (%d) doesn't match layout (%d)" % (
+                len(rec), self.reclen))
+        pos = self._offset(i)
+        self.data[pos:pos + self.reclen] = rec
+
+    def __iter__(self):
+        for pos in range(0, len(self.data), self.reclen):
+            yield RecordView(self.layout, self.data, pos)
+
+    def column(self, name):
+        """Return the values of field `name` for all records, as an
+           `array.array` for numeric fields (a list of unstripped strings
+           otherwise, or of tuples for repeated fields such as ``2i``).
+        """
+        values = self.layout.project(self.data, [name], self.batch)
+        field = self.layout[name]
+        if field.count > 1 and field.format not in 'sp':
+            it = iter(values)
+            return list(zip(*[it] * field.count))
+        typecode = array_typecodes.get(field.format)
+        if typecode is None:
+            return values
+        return array.array(typecode, values)
+
+    def as_numpy(self):
+        """Return a zero-copy numpy structured array over the records
+           (requires numpy), e.g. ``arr.as_numpy()['timestamp']`` is a
+           strided view of one column.
+        """
+        import numpy as np
+        return np.frombuffer(self.data, dtype=self.layout.to_dtype())
+
+    def set_column(self, name, values):
+        "Set field `name` of every record from the sequence `values`."
+        if len(values) != len(self):
+            raise ValueError("Got %d values for %d records" % (
+                len(values), len(self)))
+        field = self.layout[name]
+        pack_into = field.struct.pack_into
+        pos = field.position
+        repeated = field.count > 1 and field.format not in 'sp'
+        for val in values:
+            if repeated:
+                pack_into(self.data, pos, *val)
+            else:
+                pack_into(self.data, pos, val)
+            pos += self.reclen
+
+    @classmethod
+    def load(cls, rf, layout, start=0, count=None):
+        """Read `count` records (default: the rest of the file) from the
+           :class:`~fixedrec.fixedrec.RecordFile` `rf`, starting at record
+           `start`, with a single read.
+        """
+        if rf.blocksize != len(layout):
+            raise ValueError("Block size (%d) doesn't match layout (%d)" % (
+                rf.blocksize, len(layout)))
+        if count is None:
+            count = max(0, len(rf) - start)
+        arr = cls(layout, count)
+        n = rf.read_into(start, arr.data)
+        if n < count:
+            del arr.data[n * arr.reclen:]
+        return arr
+
+    def save(self, rf, start=-1):
+        """Write all records to `rf` starting at record `start` (default:
+           append) with a single write. If the layout has ``auto_checksum``
+           set, the checksums are filled in first.
+        """
+        if rf.blocksize != self.reclen:
+            raise ValueError("Block size (%d) doesn't match layout (%d)" % (
+                rf.blocksize, self.reclen))
+        if self.layout.auto_checksum:
+            self.layout.set_checksums(self.data)
+        rf.write_from(start, self.data)
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+
+"""Verification of the record checksums in a file, either all at once by
+   several processes, or continuously by a rate-limited background thread.
+
+   Usage::
+
+       bad = verify_file(fname, layout, workers=8)
+
+       scrubber = Scrubber(rf, layout, rate=4 << 20, callback=report)
+       scrubber.start()
+       ...
+       scrubber.stop()
+
+   :func:`verify_file` splits the file into record-aligned ranges that are
+   checked by a pool of processes, each mapping the file (read-only) and
+   comparing the stored checksum field of every record in its range with
+   the checksum of the record's data (see :mod:`fixedrec.checksums`). The
+   workers look up the algorithm by name, so checksums registered at run
+   time must be registered before the pool is created (i.e. at import time)
+   on platforms that don't fork. :class:`Scrubber` does the same checks
+   in a thread, without ever stopping, at a limited rate.
+"""
+import mmap
+import os
+import threading
+import time
+from struct import Struct
+from .bsd_checksum import bsd_checksum_many
+from .checksums import checksum_function, data_range
+from .fixedrec import DEFAULT_CHUNKSIZE
+from .layout import standard_format
+
+
+def _cpu_count():
+    try:
+        return os.cpu_count() or 1
+    except AttributeError:  # pragma: no cover
+        import multiprocessing
+        return multiprocessing.cpu_count()
+
+
+def _mismatches(data, reclen, algo, pos, field):
+    """Return the indexes of the (whole) records in `data` whose checksum
+       field (the `Struct` `field` at offset `pos`) doesn't match.
+    """
+    mask = (1 << (8 * field.size)) - 1
+    end = len(data) - len(data) % reclen
+    if algo == 'bsd':
+        sums = bsd_checksum_many(data, reclen, pos)
+    else:
+        fn = checksum_function(algo)
+        sums = [fn(data_range(data, ofs, ofs + pos))
+                for ofs in range(0, end, reclen)]
+    bad = []
+    for i, ofs in enumerate(range(0, end, reclen)):
+        if field.unpack_from(data, ofs + pos)[0] != int(sums[i]) & mask:
+            bad.append(i)
+    return bad
+
+
+def _verify_range(args):
+    """Return the numbers of the records in ``[start, stop)`` whose stored
+       checksum doesn't match.
+    """
+    path, reclen, algo, pos, fmt, start, stop, chunksize = args
+    field = Struct(fmt)
+    perchunk = max(1, chunksize // reclen)
+    bad = []
+    with open(path, 'rb') as fp:
+        mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        for first in range(start, stop, perchunk):
+            data = mm[first * reclen:min(stop, first + perchunk) * reclen]
+            bad.extend(first + i
+                       for i in _mismatches(data, reclen, algo, pos, field))
+    finally:
+        mm.close()
+    return bad
+
+
+def _pool_map(fn, jobs, workers):
+    "Run ``fn(job)`` for all `jobs` in `workers` processes."
+    try:
+        from concurrent.futures import ProcessPoolExecutor
+    except ImportError:  # pragma: no cover
+        from multiprocessing import Pool    # Python 2
+        pool = Pool(workers)
+        try:
+            return pool.map(fn, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(fn, jobs))
+
+
+def verify_file(path, layout, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Return a sorted list of the numbers of the records in the file at
+       `path` whose checksum field doesn't match their data. `layout` must
+       name a checksum algorithm.
+
+       `workers` is the number of processes (default: one per cpu, 1 checks
+       the file in this process). Each worker reads `chunksize` bytes at a
+       time. A partial record at the end of the file is ignored.
+    """
+    if layout.checksum is None:
+        raise ValueError("Layout %r has no checksum." % layout.name)
+    if workers is None:
+        workers = _cpu_count()
+    reclen = len(layout)
+    count = os.path.getsize(path) // reclen
+    if count == 0:
+        return []
+    field = layout[layout.checksum_field]
+    # picklable, unlike the Struct
+    fmt = field.prefix + standard_format(field.layout)
+    # a few ranges per worker, so that they finish at about the same time
+    per = max(1, -(-count // (workers * 4)))
+    jobs = [(path, reclen, layout.checksum, field.position, fmt,
+             start, min(count, start + per), chunksize)
+            for start in range(0, count, per)]
+    if workers == 1 or len(jobs) == 1:
+        results = [_verify_range(job) for job in jobs]
+    else:
+        results = _pool_map(_verify_range, jobs, workers)
+    return [recnum for bad in results for recnum in bad]
+
+
+class Scrubber(object):
+    """Background thread that walks the records of the
+       :class:`~fixedrec.fixedrec.RecordFile` `rf` over and over, verifying
+       their checksums (`layout` must name a checksum algorithm), reading at
+       most `rate` bytes per second in chunks of `chunksize` bytes.
+
+       ``callback(recnum)`` is called (in the scrubber thread) for each
+       corrupt record, once until the record verifies again. A record that
+       fails is read again `settle` seconds later before it is reported, so
+       that writes in progress aren't taken for corruption.
+
+       The scrubber reads through its own file handle, it doesn't disturb
+       the position of `rf`, and only sees data that has been flushed.
+    """
+    def __init__(self, rf, layout, rate=1 << 20, callback=None,
+                 chunksize=64 << 10, settle=1.0):
+        if layout.checksum is None:
+            raise ValueError("Layout %r has no checksum." % layout.name)
+        if rf.blocksize != len(layout):
+            raise ValueError("Block size (%d) doesn't match layout (%d)" % (
+                rf.blocksize, len(layout)))
+        self.rf = rf
+        self.layout = layout
+        self.rate = rate
+        self.callback = callback
+        self.settle = settle
+        self.perchunk = max(1, chunksize // rf.blocksize)
+        field = layout[layout.checksum_field]
+        self._check = (rf.blocksize, layout.checksum, field.position,
+                       field.struct)
+        #: next record to verify.
+        self.recnum = 0
+        #: number of completed passes over the file.
+        self.passes = 0
+        #: number of records verified so far.
+        self.checked = 0
+        #: record numbers currently known to be corrupt.
+        self.corrupt = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def progress(self):
+        "Fraction of the current pass that is done."
+        count = self.rf.count()
+        return min(1.0, float(self.recnum) / count) if count else 1.0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        "Start scrubbing in a daemon thread."
+        if self.running:
+            raise RuntimeError("Scrubber is already running.")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        "Stop the scrubber thread and wait for it to finish."
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _wait(self, seconds):
+        "Sleep for `seconds`, return True if the scrubber was stopped."
+        return self._stop.wait(max(0, seconds)) or self._stop.is_set()
+
+    def _run(self):
+        bs = self.rf.blocksize
+        deadline = time.time()
+        with open(self.rf.fname, 'rb') as fp:
+            while not self._stop.is_set():
+                count = self.rf.count()
+                if self.recnum >= count:
+                    if self.recnum:
+                        self.passes += 1
+                    self.recnum = 0
+                    if count == 0 and self._wait(self.settle):
+                        return
+                    continue
+                n = min(self.perchunk, count - self.recnum)
+                fp.seek(self.recnum * bs, 0)
+                data = fp.read(n * bs)
+                n = len(data) // bs
+                if n == 0:
+                    # the rest hasn't been flushed (or the file shrank)
+                    self.recnum = count
+                    if self._wait(self.settle):
+                        return
+                    continue
+                self._verify(fp, self.recnum, data)
+                self.recnum += n
+                self.checked += n
+                # sleep until the bytes read fit the budget (allowing a
+                # burst of up to a second's worth after idle periods)
+                deadline = max(deadline, time.time() - 1)
+                deadline += float(n * bs) / self.rate
+                if self._wait(deadline - time.time()):
+                    return
+
+    def _verify(self, fp, first, data):
+        "Verify the records in `data` (starting at record `first`)."
+        reclen = self._check[0]
+        bad = [first + i for i in _mismatches(data, *self._check)]
+        self.corrupt.difference_update(
+            set(range(first, first + len(data) // reclen)) - set(bad))
+        if bad and self._wait(self.settle):
+            return
+        for recnum in bad:
+            fp.seek(recnum * reclen, 0)
+            if not _mismatches(fp.read(reclen), *self._check):
+                self.corrupt.discard(recnum)
+            elif recnum not in self.corrupt:
+                self.corrupt.add(recnum)
+                if self.callback is not None:
+                    self.callback(recnum)
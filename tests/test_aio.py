@@ -0,0 +1,48 @@
+import pytest
+asyncio = pytest.importorskip('asyncio')
+from fixedrec.aio import AsyncRecordFile
+
+
+def run(fut):
+    return asyncio.get_event_loop().run_until_complete(fut)
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+def test_write_and_get(tmpdir, loop):
+    rf = AsyncRecordFile(tmpdir / 'aio', blocksize=4, overwrite=True)
+    run(rf.append(b'aaaa'))
+    run(rf.write_many([b'bbbb', b'cccc']))
+    run(rf.flush())
+    assert len(rf) == 3
+
+    calls = []
+    get_many = rf.rf.get_many
+    rf.rf.get_many = lambda recnums, *a: calls.append(recnums) or \
+        get_many(recnums, *a)
+    recs = run(asyncio.gather(rf.get(2), rf.get(0), rf.get(2), rf.get(7)))
+    assert recs == [b'cccc', b'aaaa', b'cccc', b'']
+    assert len(calls) == 1          # batched into one read
+    assert run(rf.get_many([1, 0])) == [b'bbbb', b'aaaa']
+    run(rf.close())
+
+
+def test_async_iteration(tmpdir, loop):
+    rf = AsyncRecordFile(tmpdir / 'aioiter', blocksize=4, overwrite=True)
+    records = [c * 4 for c in (b'a', b'b', b'c')]
+    run(rf.write_many(records))
+    it = rf.__aiter__()
+    found = []
+    while True:
+        try:
+            found.append(run(it.__anext__()))
+        except StopAsyncIteration:
+            break
+    assert found == records
+    run(rf.close())
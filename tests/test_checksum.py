@@ -0,0 +1,43 @@
+import random
+import pytest
+from fixedrec.bsd_checksum import bsd_checksum, bsd_checksum_many
+
+
+def test_bsd_checksum_many():
+    reclen = 40
+    data = bytearray(random.randrange(256) for _i in range(reclen * 50 + 3))
+    sums = bsd_checksum_many(data, reclen, 36)
+    assert len(sums) == 50
+    assert list(sums) == [bsd_checksum(data[i:i + 36])
+                          for i in range(0, 50 * reclen, reclen)]
+    assert list(bsd_checksum_many(bytes(data), reclen, 0)) == [0] * 50
+    assert len(bsd_checksum_many(b'', reclen, 36)) == 0
+    assert len(bsd_checksum_many(data, reclen, reclen)) == 50
+    for nbytes in (reclen + 1, -1):
+        with pytest.raises(ValueError):
+            bsd_checksum_many(data, reclen, nbytes)
+
+
+def test_incremental(tmpdir):
+    from fixedrec.bsd_checksum import BsdChecksum, checksum_file
+    data = bytearray(random.randrange(256) for _i in range(20000))
+    cs = BsdChecksum()
+    cs.update(memoryview(data)[:7000])
+    saved = cs.copy()
+    cs.update(bytes(data[7000:]))
+    assert cs.digest() == bsd_checksum(data)
+    assert cs.length == 20000
+    assert cs.hexdigest() == '%04x' % cs.digest()
+    assert saved.length == 7000
+    assert saved.digest() == bsd_checksum(data[:7000])
+
+    fname = tmpdir / 'csum'
+    with open(fname.strpath, 'wb') as fp:
+        fp.write(data[:7000])
+    assert checksum_file(fname.strpath) == (saved.digest(), 7000)
+    with open(fname.strpath, 'ab') as fp:
+        fp.write(data[7000:])
+    assert checksum_file(fname.strpath, 1000, saved) == (cs.digest(), 20000)
+    assert saved.length == 7000                 # not updated in place
+    assert checksum_file(fname.strpath, 512, saved) == (cs.digest(), 20000)
+    assert checksum_file(fname.strpath, 333) == (cs.digest(), 20000)
@@ -0,0 +1,97 @@
+import os
+import threading
+import pytest
+from fixedrec import RecordFile, RecordFileError
+from fixedrec.durability import FsyncEvery, FsyncInterval, commit_policy
+
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    calls = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        calls.append(fd)
+        real_fsync(fd)
+    monkeypatch.setattr(os, 'fsync', fsync)
+    return calls
+
+
+def test_unknown_policy(tmpdir):
+    with pytest.raises(RecordFileError):
+        RecordFile(tmpdir / 'x', commit='sometimes')
+    with pytest.raises(ValueError):
+        commit_policy('sometimes')
+
+
+def test_none(tmpdir, fsyncs):
+    name = tmpdir / 'none'
+    bf = RecordFile(name, overwrite=True, commit='none')
+    bf[-1] = 'aaaa'
+    assert os.path.getsize(name.strpath) == 0   # not flushed
+    bf.close()
+    assert os.path.getsize(name.strpath) == 4
+    assert fsyncs == []
+
+
+def test_flush_per_write(tmpdir, fsyncs):
+    name = tmpdir / 'flush'
+    bf = RecordFile(name, overwrite=True)
+    bf[-1] = 'aaaa'
+    assert os.path.getsize(name.strpath) == 4
+    bf.close()
+    assert fsyncs == []
+
+
+def test_explicit(tmpdir, fsyncs):
+    bf = RecordFile(tmpdir / 'explicit', overwrite=True, commit='explicit')
+    bf.extend(['aaaa', 'bbbb'])
+    assert bf.policy.pending == 2
+    bf.commit()
+    bf.commit()             # nothing new to commit
+    assert bf.policy.pending == 0
+    assert len(fsyncs) == 1
+    bf[-1] = 'cccc'
+    bf.close()
+    assert len(fsyncs) == 2
+
+
+def test_fsync_every(tmpdir, fsyncs):
+    bf = RecordFile(tmpdir / 'every', overwrite=True, commit=FsyncEvery(3))
+    for i in range(7):
+        bf[-1] = 'aaaa'
+    assert len(fsyncs) == 2
+    assert bf.policy.pending == 1
+    bf.close()
+    assert len(fsyncs) == 3
+
+
+def test_fsync_interval(tmpdir, fsyncs):
+    policy = FsyncInterval(10)
+    bf = RecordFile(tmpdir / 'interval', overwrite=True, commit=policy)
+    done = threading.Event()
+    real_commit = policy.commit
+
+    def commit(rf):
+        real_commit(rf)
+        done.set()
+    policy.commit = commit
+    bf[-1] = 'aaaa'
+    bf[-1] = 'bbbb'
+    assert done.wait(5)
+    assert len(fsyncs) == 1
+    assert policy.pending == 0
+    bf.close()
+    assert len(fsyncs) == 1
+
+
+def test_group_commit(tmpdir, fsyncs):
+    bf = RecordFile(tmpdir / 'group', overwrite=True, commit='explicit')
+    bf.extend(['aaaa'] * 10)
+    threads = [threading.Thread(target=bf.commit) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(fsyncs) == 1
+    bf.close()
@@ -82,3 +82,73 @@ def test_nolayout():
 def test_length():
     lout = Layout('=ci')
     assert len(lout) == 5
+
+
+def test_byteorder():
+    for prefix, expected in [('<', '\x01\x02'), ('>', '\x02\x01'),
+                             ('!', '\x02\x01')]:
+        lout = Layout(prefix + '2sH', 'name', 'val')
+        data = bytearray(4)
+        lout['val'].set_value(data, 0x0201)
+        assert data[2:] == expected
+        assert lout['val'].get_value(data) == 0x0201
+        assert lout['val'].get_value(memoryview(data)) == 0x0201
+        assert lout['val'].struct.format in (prefix + 'H', (prefix + 'H').encode())
+
+
+def test_get_value_strip():
+    lout = Layout('=4s', 'name')
+    assert lout['name'].get_value(bytearray('ab\0\0')) == 'ab'
+    assert lout['name'].get_value(b'ab\0\0') == 'ab'
+
+
+def test_unpack_pack():
+    lout = Layout('>2xH4sc', 'pad', 'num', 'name', 'ch', name='Rec')
+    data = bytearray(9)
+    lout.pack_into(data, 0, (258, 'abc', 'Z'))
+    assert data == '\0\0\x01\x02abc\0Z'
+    assert lout.pack((258, 'abc', 'Z')) == str(data)
+    rec = lout.unpack(data)
+    assert rec == (258, 'abc\0', 'Z')
+    assert rec.num == 258
+    assert rec.name == 'abc\0'
+    assert type(lout.unpack(data, named=False)) is tuple
+    assert lout.unpack('xx' + str(data), 2) == rec
+
+
+def test_unpack_display_name():
+    for name in ['Status Record', 'status-v2', '2024rec', 'class']:
+        lout = Layout('=HB', 'num', 'flag', name=name)
+        assert lout.name == name
+        assert lout.unpack(bytearray(3)).num == 0
+        assert lout.make_record_class()().num == 0
+
+
+def test_unpack_unnamed():
+    lout = Layout('=3HB')
+    assert lout.tuple_type is None
+    assert lout.unpack(bytearray(7)) == (0, 0, 0, 0)
+
+
+def test_native_only_formats():
+    lout = Layout('iPH', 'a', 'ptr', 'b')
+    assert len(lout) == 10
+    assert [f.position for f in lout.fields] == [0, 4, 8]
+    data = bytearray(10)
+    lout.pack_into(data, 0, (1, 2, 3))
+    assert lout.unpack(data) == (1, 2, 3)
+    assert lout['ptr'].get_value(data) == 2
+    assert lout.projection(['ptr', 'b']).unpack_from(data) == (2, 3)
+
+
+def test_native_only_sizes():
+    import struct
+    try:
+        struct.calcsize('nN')
+    except struct.error:
+        pytest.skip("no 'n'/'N' struct codes (Python 2)")
+    lout = Layout('nN', 'ssize', 'size')
+    data = bytearray(len(lout))
+    lout.pack_into(data, 0, (-3, 4))
+    assert lout.unpack(data) == (-3, 4)
+    assert lout['size'].get_value(data) == 4
@@ -0,0 +1,122 @@
+import pytest
+np = pytest.importorskip('numpy')
+from fixedrec import RecordFile, RecordFileError
+from fixedrec.layout import Layout
+from fixedrec.recordarray import RecordArray
+
+layout = Layout('>4sxHq2i', 'name', 'pad', 'num', 'timestamp', 'pair')
+
+
+def test_to_dtype():
+    dtype = layout.to_dtype()
+    assert dtype.itemsize == len(layout)
+    assert dtype.names == ('name', 'num', 'timestamp', 'pair')
+    assert dtype.fields['num'] == (np.dtype('>u2'), 5)
+    assert dtype.fields['pair'][0].shape == (2,)
+    assert Layout('<cd').to_dtype().names == ('f0', 'f1')
+
+
+def test_record_array_as_numpy():
+    arr = RecordArray(layout, 3)
+    arr.set_column('timestamp', [3, 1, 2])
+    view = arr.as_numpy()
+    assert list(view['timestamp']) == [3, 1, 2]
+    view['num'] = 9                     # writes go to the records
+    assert arr[1].num == 9
+
+
+def test_as_numpy(tmpdir):
+    arr = RecordArray(layout, 4)
+    arr.set_column('timestamp', [10, 20, 30, 40])
+    arr[2].name = b'abc'
+    with RecordFile(tmpdir / 'np', blocksize=len(layout),
+                    overwrite=True) as rf:
+        assert len(rf.as_numpy(layout)) == 0
+        arr.save(rf)
+        mm = rf.as_numpy(layout)
+        assert mm['timestamp'].sum() == 100
+        assert mm['name'][2] == b'abc'
+        mm['num'][0] = 513
+        mm.flush()
+        assert rf[0][4:7] == b'\0\x02\x01'
+
+
+def test_write_columns(tmpdir):
+    n = 1000
+    with RecordFile(tmpdir / 'cols', blocksize=len(layout), overwrite=True,
+                    bufsize=100) as rf:
+        assert rf.write_columns(layout, {
+            'timestamp': np.arange(n),
+            'name': [b'x'] * n,
+        }) == n
+        assert len(rf) == n
+        mm = rf.as_numpy(layout)
+        assert (mm['timestamp'] == np.arange(n)).all()
+        assert (mm['num'] == 0).all()
+        assert mm['name'][999] == b'x'
+
+        rf.write_columns(layout, {'num': [7, 8]}, start=10)
+        assert list(rf.as_numpy(layout)['num'][9:13]) == [0, 7, 8, 0]
+
+        with pytest.raises(RecordFileError):
+            rf.write_columns(layout, {'nosuch': [1]})
+        with pytest.raises(RecordFileError):
+            rf.write_columns(layout, {'pad': [1]})
+        with pytest.raises(RecordFileError):
+            rf.write_columns(layout, {'num': [1], 'timestamp': [1, 2]})
+
+
+def test_write_columns_validation(tmpdir):
+    lout = Layout('=HhdI', 'small', 'signed', 'real', 'big')
+    with RecordFile(tmpdir / 'cols', blocksize=len(lout),
+                    overwrite=True) as rf:
+        for cols in [{'small': np.array([70000, 1])},
+                     {'small': [-1, 2]},
+                     {'signed': [40000, 0]},
+                     {'big': [1 << 40, 0]},
+                     {'small': [1.9, 2.7]},
+                     {'big': np.array([1.0, 2.0])},
+                     {'small': [1 << 70, 0]}]:
+            with pytest.raises(RecordFileError):
+                rf.write_columns(lout, cols)
+        assert len(rf) == 0
+        assert rf.write_columns(lout, {
+            'small': np.arange(65534, 65536),
+            'signed': np.array([-32768, 5], dtype=np.int16),
+            'real': [1, 2.5],
+            'big': [True, 4]}) == 2
+        mm = rf.as_numpy(lout)
+        assert list(mm['small']) == [65534, 65535]
+        assert list(mm['real']) == [1.0, 2.5]
+
+
+def test_write_structured(tmpdir):
+    arr = np.zeros(50, dtype=layout.to_dtype())
+    arr['num'] = np.arange(50)
+    with RecordFile(tmpdir / 'struct', blocksize=len(layout), overwrite=True,
+                    bufsize=100) as rf:
+        assert rf.write_structured(arr) == 50
+        other = np.zeros(3, dtype=[('timestamp', '<i8'), ('num', '<i4')])
+        other['timestamp'] = 5
+        rf.write_structured(other, layout, start=0)
+        mm = rf.as_numpy(layout)
+        assert len(mm) == 50
+        assert list(mm['timestamp'][:4]) == [5, 5, 5, 0]
+        assert list(mm['num'][:4]) == [0, 0, 0, 3]
+        with pytest.raises(RecordFileError):
+            rf.write_structured(other)
+
+
+def test_write_structured_auto_checksum(tmpdir):
+    from fixedrec.verify import verify_file
+    lout = Layout('=4sqI', 'name', 'timestamp', 'chksum', checksum='bsd',
+                  auto_checksum=True)
+    arr = np.zeros(30, dtype=lout.to_dtype())
+    arr['timestamp'] = np.arange(30)
+    name = str(tmpdir / 'auto')
+    with RecordFile(name, blocksize=len(lout), overwrite=True,
+                    bufsize=100) as rf:
+        rf.write_structured(arr, lout)
+        rf.write_columns(lout, {'timestamp': np.arange(7)})
+    assert not arr['chksum'].any()          # the caller's array is untouched
+    assert verify_file(name, lout, workers=1) == []
@@ -0,0 +1,58 @@
+import pytest
+from fixedrec import RecordFile
+from fixedrec.layout import Layout
+from fixedrec.query import Query
+from fixedrec.recordarray import RecordArray
+
+layout = Layout('=4sxHq', 'name', 'pad', 'num', 'timestamp')
+
+
+@pytest.fixture
+def rf(tmpdir, request):
+    arr = RecordArray(layout, 100)
+    arr.set_column('num', range(100))
+    arr.set_column('timestamp', [i * 10 for i in range(100)])
+    arr.set_column('name', ['even', 'odd'] * 50)
+    rf = RecordFile(tmpdir / 'query', blocksize=len(layout), overwrite=True)
+    arr.save(rf)
+    request.addfinalizer(rf.close)
+    return rf
+
+
+def test_where(rf):
+    q = Query(rf, layout, chunksize=150)
+    assert len(list(q)) == 100
+    recs = list(q.where('name', '==', 'odd').where('num', '<', 10))
+    assert [r.num for r in recs] == [1, 3, 5, 7, 9]
+    assert recs[0].name == 'odd'
+    assert [r.num for r in q.where('num', '==', 42)] == [42]
+    assert list(q.where('num', '==', 1 << 20)) == []
+    assert list(q.where('name', '==', 'too long')) == []
+    assert len(list(q.where('name', '!=', 'odd'))) == 50
+    assert [r.num for r in q.where('num', 'in', (3, 4))] == [3, 4]
+
+
+def test_select_limit(rf):
+    q = Query(rf, layout).where('timestamp', '>=', 500)
+    rows = list(q.select('timestamp', 'num').limit(3))
+    assert rows == [(500, 50), (510, 51), (520, 52)]
+    assert list(q.limit(5).limit(2).select('num')) == [(50,), (51,)]
+    assert list(q.select('num', 'name').limit(2)) == [(50, 'even'),
+                                                      (51, 'odd')]
+
+
+def test_errors(rf):
+    q = Query(rf, layout)
+    with pytest.raises(ValueError):
+        q.where('num', '~', 1)
+    with pytest.raises(ValueError):
+        q.where('nosuch', '==', 1)
+    with pytest.raises(ValueError):
+        q.select('pad')
+    q = Query(rf, Layout('=3HI5x', 'trip', 'num', 'pad'))
+    with pytest.raises(ValueError):
+        q.select('trip', 'num')
+    with pytest.raises(ValueError):
+        q.where('trip', '==', (1, 2, 3))
+    with pytest.raises(ValueError):
+        Query(rf, Layout('=4s'))
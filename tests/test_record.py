@@ -124,3 +124,131 @@ def test_example():
     r2 = StatusRecord(data=r1._data)
     assert verifyrec(r2)
     
+
+
+def test_make_record_class():
+    Rec = record_layout.make_record_class()
+    assert Rec.__name__ == 'Record'
+    assert Rec.layout is record_layout
+    r = Rec(key='hello', timestamp=42)
+    assert r.key == 'hello'
+    assert r.timestamp == 42
+    r.rectype = 'abc'
+    assert r.rectype == 'abc'
+    assert len(r) == 256
+    with pytest.raises(AttributeError):
+        r.no_such_field = 1         # no __dict__
+    assert not hasattr(r, '__dict__')
+
+    r2 = Rec(r._data)
+    assert r2.as_dict() == r.as_dict()
+    assert MyBaseRecord(r._data).key == 'hello'
+
+    plain = Record(record_layout, r._data)
+    plain.foo = 1                   # plain records keep their __dict__
+    plain._cache = 2
+    assert (plain.foo, plain._cache) == (1, 2)
+
+
+def test_record_unpack():
+    r = MyBaseRecord(key='hello', timestamp=7)
+    values = r.unpack()
+    assert len(values) == 10        # the pad field has no value
+    assert values.timestamp == 7
+    assert values.key.rstrip('\0') == 'hello'
+    assert record_layout.pack(values) == str(r._data)
+
+
+def test_record_view():
+    from fixedrec.record import RecordView
+    lout = Layout('=4sH', 'name', 'num')
+    buf = bytearray('ab\0\0\x01\0cd\0\0\x02\0')
+    view = RecordView(lout, memoryview(buf))
+    assert view.name == 'ab'
+    assert view.rebind(6) is view
+    assert (view.name, view.num) == ('cd', 2)
+    view.num = 7
+    assert buf[10] == 7
+    assert view.unpack() == ('cd\0\0', 7)
+    assert view.tobytes() == 'cd\0\0\x07\0'
+    assert view.record().num == 7
+    view.rebind(0, 'xyz\0\x05\0')
+    assert view.num == 5
+    with pytest.raises(AttributeError):
+        view.missing
+
+
+def test_layout_checksum():
+    import zlib
+    from fixedrec.record import RecordView
+    for algo, size in [('bsd', 'H'), ('crc32', 'I'), ('adler32', 'I')]:
+        lout = Layout('=4sQ' + size + 'cc', 'rectype', 'timestamp', 'chksum',
+                      'cr', 'nl', checksum=algo)
+        r = Record(lout, rectype='ver', timestamp=42)
+        assert not r.verify()
+        r.set_checksum()
+        assert r.verify()
+        r.timestamp = 43
+        assert not r.verify()
+        r.set_checksum()
+        r.nl = '\n'                 # not covered by the checksum
+        assert r.verify()
+        assert RecordView(lout, 'xx' + str(r._data), 2).verify()
+    assert r.chksum == zlib.adler32(str(r._data[:12])) & 0xffffffff
+
+    lout = Layout('=4sHH', 'body', 'chksum', 'crc', checksum='crc32',
+                  checksum_field='crc')
+    r = Record(lout, body='abcd')
+    r.set_checksum()
+    assert r.crc == zlib.crc32('abcd\0\0') & 0xffff   # truncated
+
+    with pytest.raises(ValueError):
+        Layout('=4sH', 'data', 'chksum', checksum='md17')
+    with pytest.raises(ValueError):
+        Layout('=4sH', 'data', 'sum', checksum='bsd')
+    with pytest.raises(ValueError):
+        MyBaseRecord().verify()
+
+
+def test_auto_checksum(tmpdir):
+    from fixedrec import RecordFile
+    lout = Layout('=4sQHcc', 'rectype', 'timestamp', 'chksum', 'cr', 'nl',
+                  checksum='bsd', auto_checksum=True)
+    calls = []
+    set_checksum = lout.set_checksum
+
+    def counting(buf, offset=0):
+        calls.append(offset)
+        return set_checksum(buf, offset)
+    lout.set_checksum = counting
+
+    for cls in Record, lout.make_record_class():
+        del calls[:]
+        r = cls(lout, rectype='ver') if cls is Record else cls(rectype='ver')
+        r.timestamp = 42
+        r.cr = '\r'
+        r.nl = '\n'
+        assert calls == []
+        assert r.chksum == bsd_checksum(str(r._data[:12]))
+        assert r.verify()
+        assert len(calls) == 1
+        r.timestamp = 43
+        assert not lout.verify_checksum(r._data)
+        data = r.tobytes()
+        assert len(calls) == 2
+        assert lout.verify_checksum(data)
+
+        rf = RecordFile(str(tmpdir / 'auto'), blocksize=len(lout),
+                        overwrite=True)
+        r.timestamp = 44
+        rf[0] = r
+        rf.write_many([r, r])
+        assert len(calls) == 3
+        assert all(lout.verify_checksum(rec) for rec in rf)
+        rf.close()
+
+    # records read from a file keep their stored checksum
+    r = Record(lout, data)
+    assert not r._dirty
+    with pytest.raises(ValueError):
+        Layout('=4sH', 'body', 'chksum', auto_checksum=True)
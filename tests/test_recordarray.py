@@ -0,0 +1,81 @@
+import array
+import pytest
+from fixedrec import RecordFile
+from fixedrec.layout import Layout
+from fixedrec.record import Record
+from fixedrec.recordarray import RecordArray
+
+layout = Layout('=4sxHq', 'name', 'pad', 'num', 'timestamp')
+
+
+def test_record_array():
+    arr = RecordArray(layout, 3)
+    assert len(arr) == 3
+    assert len(arr.data) == 45
+    arr[1].name = 'bob'
+    arr[-1].num = 7
+    arr[0] = Record(layout, name='amy', timestamp=-1)
+    assert [r.name for r in arr] == ['amy', 'bob', '']
+    assert arr[2].num == 7
+    with pytest.raises(IndexError):
+        arr[3]
+    with pytest.raises(ValueError):
+        arr[0] = 'short'
+    with pytest.raises(ValueError):
+        RecordArray(layout, 2, bytearray(10))
+
+
+def test_columns():
+    arr = RecordArray(layout, 2500)
+    arr.batch = 1000
+    arr.set_column('num', range(2500))
+    nums = arr.column('num')
+    assert isinstance(nums, array.array)
+    assert list(nums) == list(range(2500))
+    assert arr[1234].num == 1234
+    arr.set_column('timestamp', [-5] * 2500)
+    assert set(arr.column('timestamp')) == {-5}
+    assert arr.column('name')[:2] == ['\0' * 4] * 2
+    with pytest.raises(ValueError):
+        arr.set_column('num', [1])
+
+
+def test_repeated_column():
+    arr = RecordArray(Layout('=2s2iH', 'tag', 'pair', 'num'), 5)
+    arr.batch = 2
+    arr.set_column('pair', [(i, -i) for i in range(5)])
+    arr.set_column('num', range(5))
+    assert arr.column('pair') == [(i, -i) for i in range(5)]
+    assert list(arr.column('num')) == list(range(5))
+    assert arr.column('tag') == ['\0\0'] * 5
+
+
+def test_load_save(tmpdir):
+    arr = RecordArray(layout, 3)
+    arr.set_column('num', [1, 2, 3])
+    with RecordFile(tmpdir / 'arr', blocksize=15, overwrite=True) as rf:
+        arr.save(rf)
+        arr.save(rf)
+        assert len(rf) == 6
+        loaded = RecordArray.load(rf, layout, start=2)
+        assert list(loaded.column('num')) == [3, 1, 2, 3]
+        assert list(RecordArray.load(rf, layout, 4, 10).column('num')) == [2, 3]
+        with pytest.raises(ValueError):
+            RecordArray.load(rf, Layout('=4s'))
+
+
+def test_auto_checksum(tmpdir):
+    from fixedrec.verify import verify_file
+    lout = Layout('=4sqI', 'name', 'timestamp', 'chksum', checksum='crc32',
+                  auto_checksum=True)
+    name = str(tmpdir / 'auto')
+    with RecordFile(name, blocksize=len(lout), overwrite=True) as rf:
+        rf.write_columns(lout, {'timestamp': [1, 2, 3]})
+        arr = RecordArray(lout, 2)
+        arr[0].timestamp = 4
+        arr[1].name = 'bob'
+        assert arr[1].verify()            # views update the checksum
+        arr.set_column('timestamp', [5, 6])
+        arr.save(rf)
+        assert len(rf) == 5
+    assert verify_file(name, lout, workers=1) == []
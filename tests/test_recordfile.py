@@ -171,3 +171,294 @@ def test_speed(tmpdir):  # pragma: no cover
     readt = time.time()
     read_step = readt - writet
     assert read_step < 0.55  # 180K+ reads/sec
+
+
+def test_mmap_read(tmpdir):
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=4, overwrite=True, use_mmap=True) as bf:
+        assert list(bf) == []
+        bf[-1] = 'aaaa'
+        bf[-1] = 'bbbb'
+        assert bf[0] == 'aaaa'
+        bf.write('cccc', flush=False)   # appending grows the mapping
+        assert bf[2] == 'cccc'
+        assert bf[3] == ''
+        bf[1] = 'xxxx'                  # overwrites are visible
+        assert list(bf) == ['aaaa', 'xxxx', 'cccc']
+        bf.goto_recnum(1)
+        assert bf.read() == 'xxxx'
+        assert bf.read() == 'cccc'
+        del bf[0]
+        assert str(bf) == 'ccccxxxx'
+
+
+def test_mmap_truncate_with_views(tmpdir):
+    name = fname(tmpdir)
+    bf = RecordFile(name, blocksize=4, overwrite=True, use_mmap=True)
+    bf[-1] = 'aaaa'
+    bf[-1] = 'bbbb'
+    view = bf[1]
+    if isinstance(view, memoryview):
+        with pytest.raises(RecordFileError):
+            bf.truncate(1)
+        view.release()
+    bf.truncate(1)
+    assert list(bf) == ['aaaa']
+    bf.close()
+
+
+def test_mmap_truncate_with_views_before_growth(tmpdir):
+    import mmap
+    name = fname(tmpdir)
+    bs = mmap.PAGESIZE
+    bf = RecordFile(name, blocksize=bs, overwrite=True, use_mmap=True)
+    bf.extend([b'a' * bs, b'b' * bs])
+    view = bf[1]
+    bf[-1] = b'c' * bs
+    assert bf[2] == b'c' * bs              # the file is mapped again
+    if isinstance(view, memoryview):
+        with pytest.raises(RecordFileError):
+            bf.truncate(1)
+        assert len(bf) == 3
+        assert view == b'b' * bs
+        view.release()
+    bf.truncate(1)
+    assert list(bf) == [b'a' * bs]
+    bf.close()
+
+
+def test_mmap_delete_with_views(tmpdir):
+    name = fname(tmpdir)
+    bf = RecordFile(name, blocksize=4, overwrite=True, use_mmap=True)
+    bf.extend(['aaaa', 'bbbb', 'cccc'])
+    view = bf[0]
+    if isinstance(view, memoryview):
+        with pytest.raises(RecordFileError):
+            del bf[0]
+        assert list(bf) == ['aaaa', 'bbbb', 'cccc']     # untouched
+        view.release()
+    del bf[0]
+    assert list(bf) == ['cccc', 'bbbb']
+    bf.close()
+
+
+def test_read_many(tmpdir):
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=4, overwrite=True) as bf:
+        bf[0] = ['aaaa', 'bbbb', 'cccc', 'dddd']
+        assert bf.read_many(1, 2) == ['bbbb', 'cccc']
+        assert bf.read_many(3, 5) == ['dddd']
+        assert bf[1:3] == ['bbbb', 'cccc']
+        assert bf[2:] == ['cccc', 'dddd']
+        assert bf[-2:-1] == ['cccc']
+        assert bf[5:] == []
+        assert bf[0:10 ** 12] == ['aaaa', 'bbbb', 'cccc', 'dddd']
+        assert bf[-100:] == ['aaaa', 'bbbb', 'cccc', 'dddd']
+        assert bf[-100:2] == ['aaaa', 'bbbb']
+        assert bf[1:-100] == []
+        bf[-100:1] = ['xxxx']
+        assert bf[0] == 'xxxx'
+        bf[0] = 'aaaa'
+        assert bf.read_many(2, 10 ** 12) == ['cccc', 'dddd']
+        with pytest.raises(RecordFileError):
+            bf[::2]
+
+
+def test_slice_assignment(tmpdir):
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=4, overwrite=True) as bf:
+        bf[0:3] = ['aaaa', 'bbbb', 'cccc']
+        bf[1:3] = ['xxxx', 'yyyy']
+        assert list(bf) == ['aaaa', 'xxxx', 'yyyy']
+        bf[3:] = bf[0:2]
+        assert str(bf) == 'aaaaxxxxyyyyaaaaxxxx'
+        with pytest.raises(RecordFileError):
+            bf[0:2] = ['zzzz']
+        with pytest.raises(RecordFileError):
+            bf[0:1] = ['zz']
+
+
+def test_mmap_read_many(tmpdir):
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=4, overwrite=True, use_mmap=True) as bf:
+        bf[0] = ['aaaa', 'bbbb', 'cccc']
+        assert bf[1:] == ['bbbb', 'cccc']
+        bf.swap(0, 2)
+        assert str(bf) == 'ccccbbbbaaaa'
+
+
+def test_write_many(tmpdir):
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=4, overwrite=True, bufsize=10) as bf:
+        assert bf.extend(c * 4 for c in 'abcde') == 5
+        bf.flush()
+        assert str(bf) == 'aaaabbbbccccddddeeee'
+        bf.goto_recnum(1)
+        assert bf.write_many(['xxxx', 'yyyy'], flush=True) == 2
+        assert bf.extend([]) == 0
+        assert list(bf) == ['aaaa', 'xxxx', 'yyyy', 'dddd', 'eeee']
+        with pytest.raises(RecordFileError):
+            bf.extend(['zz'])
+    with RecordFile(name, blocksize=4, overwrite=True, bufsize=8) as bf:
+        with pytest.raises(RecordFileError):
+            bf.extend(['aaaa', 'bbbb', 'cccc', 'zz'])
+        assert len(bf) == 2                 # the first buffer was written
+        assert bf.policy.pending == 2
+        assert list(bf) == ['aaaa', 'bbbb']
+
+
+def test_write_many_mmap(tmpdir):
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=4, overwrite=True, use_mmap=True) as bf:
+        bf.extend(['aaaa', 'bbbb'])
+        assert bf[1] == 'bbbb'     # pending writes are flushed before reading
+
+
+@pytest.mark.skipif("not hasattr(os, 'pread')")
+def test_positional(tmpdir):
+    import threading
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=4, overwrite=True, positional=True) as bf:
+        bf[-1] = b'aaaa'
+        bf[-1] = [b'bbbb', b'cccc']
+        bf.goto_first_record()
+        assert bf[2] == b'cccc'
+        assert bf.fp.tell() == 0      # shared position is untouched
+        assert bf[1:] == [b'bbbb', b'cccc']
+
+        def work(i):
+            for j in range(50):
+                bf[i] = bytes(bytearray([65 + i] * 4))
+                assert bf[i] == bytes(bytearray([65 + i] * 4))
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert b''.join(bf) == b'AAAABBBBCCCCDDDDEEEEFFFFGGGGHHHH'
+
+
+@pytest.mark.skipif("not hasattr(os, 'pread')")
+def test_positional_read_into_without_preadv(tmpdir, monkeypatch):
+    import threading
+    monkeypatch.delattr(os, 'preadv', raising=False)
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=4, overwrite=True, positional=True) as bf:
+        bf[0] = [bytes(bytearray([65 + i] * 4)) for i in range(8)]
+        errors = []
+
+        def work(i):
+            buf = bytearray(4)
+            for j in range(200):
+                bf.read_into(i, buf)
+                if buf != bytearray([65 + i] * 4):
+                    errors.append(i)
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+
+
+def test_cached_count(tmpdir):
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=4, overwrite=True, commit='none') as bf:
+        bf[-1] = 'aaaa'
+        bf.extend(['bbbb', 'cccc'])
+        assert len(bf) == 3
+        bf[4] = 'eeee'
+        assert len(bf) == 5
+        bf[1] = 'xxxx'
+        assert len(bf) == 5
+        del bf[0]
+        assert len(bf) == 4
+        bf.truncate(2)
+        assert len(bf) == 2
+        bf.flush()
+
+        with open(name.strpath, 'ab') as fp:   # another writer
+            fp.write('ffff')
+        assert len(bf) == 2
+        assert bf.count(refresh=True) == 3
+        assert list(bf) == ['eeee', 'xxxx', 'ffff']
+
+
+def test_readahead(tmpdir):
+    name = fname(tmpdir)
+    records = [c * 4 for c in 'abcdefg']
+    with RecordFile(name, blocksize=4, overwrite=True) as bf:
+        bf.extend(records)
+        assert list(bf.readahead(chunksize=8)) == records
+        assert list(bf.readahead(chunksize=1, start=5)) == records[5:]
+        assert [r.tobytes() for r in bf.readahead(12, recycle=True)] == records
+        recycled = list(bf.readahead(chunksize=12, recycle=True))
+        assert recycled[0] == 'gggg'    # overwritten by the last chunk
+
+    with RecordFile(name, blocksize=4, use_mmap=True) as bf:
+        assert list(bf.readahead(chunksize=8)) == records
+
+
+def test_prefetch(tmpdir):
+    name = fname(tmpdir)
+    records = [c * 4 for c in 'abcdefghij']
+    with RecordFile(name, blocksize=4, overwrite=True) as bf:
+        bf.extend(records)
+        assert list(bf.prefetch(chunksize=8)) == records
+        assert list(bf.prefetch(chunksize=12, depth=1, start=4)) == records[4:]
+        assert [r.tobytes() for r in
+                bf.prefetch(chunksize=8, depth=1, recycle=True)] == records
+        it = bf.prefetch(chunksize=4, depth=1, recycle=True)
+        assert next(it) == 'aaaa'
+        it.close()      # stops the reader thread
+
+
+def test_get_many(tmpdir):
+    name = fname(tmpdir)
+    records = [c * 4 for c in 'abcdefghijklmnopqrst']
+    with RecordFile(name, blocksize=4, overwrite=True) as bf:
+        bf.extend(records)
+        reads = []
+        read_many = bf.read_many
+        bf.read_many = lambda start, count: reads.append((start, count)) or \
+            read_many(start, count)
+        assert bf.get_many([17, 2, 3, 2, 25, 0]) == [
+            'rrrr', 'cccc', 'dddd', 'cccc', '', 'aaaa']
+        assert bf.get_many([]) == []
+        assert bf.get_many([1, 9, 19], gap=2) == ['bbbb', 'jjjj', 'tttt']
+        assert reads == [(0, 26), (1, 1), (9, 1), (19, 1)]
+        with pytest.raises(RecordFileError):
+            bf.get_many([-1, 2])
+
+
+def test_write_columns(tmpdir):
+    from fixedrec.layout import Layout
+    layout = Layout('=2sH', 'name', 'num')
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=4, overwrite=True, bufsize=8) as bf:
+        assert bf.write_columns(layout, {
+            'name': ['ab', 'cd', 'ef'],
+            'num': [1, 2, 3]}) == 3
+        bf.write_columns(layout, {'num': [0x4141]}, start=1)
+        assert list(bf) == ['ab\x01\0', '\0\0AA', 'ef\x03\0']
+        with pytest.raises(RecordFileError):
+            bf.write_columns(layout, {'nosuch': []})
+
+
+def test_scan(tmpdir):
+    from fixedrec.layout import Layout
+    from fixedrec.recordarray import RecordArray
+    layout = Layout('=2sxHI', 'name', 'pad', 'num', 'big')
+    arr = RecordArray(layout, 2100)
+    arr.set_column('num', range(2100))
+    arr.set_column('big', [7] * 2100)
+    arr[5].name = 'ab'
+    name = fname(tmpdir)
+    with RecordFile(name, blocksize=len(layout), overwrite=True) as bf:
+        arr.save(bf)
+        rows = list(bf.scan(layout, ['num']))
+        assert rows == [(i,) for i in range(2100)]
+        assert list(bf.scan(layout, ['big', 'num'], chunksize=90))[3] == (7, 3)
+        assert list(bf.scan(layout, start=5))[0] == ('ab', 5, 7)
+        with pytest.raises(RecordFileError):
+            list(bf.scan(layout, ['pad']))
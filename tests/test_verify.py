@@ -0,0 +1,94 @@
+import time
+import pytest
+from fixedrec import RecordFile
+from fixedrec.layout import Layout
+from fixedrec.record import Record
+from fixedrec.verify import verify_file, Scrubber
+
+
+def make_file(tmpdir, lout, n, corrupt):
+    name = str(tmpdir / 'verify')
+    rf = RecordFile(name, blocksize=len(lout), overwrite=True)
+    records = []
+    for i in range(n):
+        r = Record(lout, key=b'k%d' % i, timestamp=i * 7)
+        r.set_checksum()
+        if i in corrupt:
+            r.timestamp += 1
+        records.append(r._data)
+    rf.write_many(records)
+    rf.close()
+    return name
+
+
+@pytest.mark.parametrize('algo', ['bsd', 'crc32'])
+def test_verify_file(tmpdir, algo):
+    lout = Layout('=6sQIcc', 'key', 'timestamp', 'chksum', 'cr', 'nl',
+                  checksum=algo)
+    corrupt = [0, 17, 99, 250, 299]
+    name = make_file(tmpdir, lout, 300, corrupt)
+    assert verify_file(name, lout, workers=1) == corrupt
+    assert verify_file(name, lout, workers=3, chunksize=100) == corrupt
+    with open(name, 'ab') as fp:
+        fp.write(b'xx')                         # partial record is ignored
+    assert verify_file(name, lout, workers=2) == corrupt
+
+
+def test_verify_file_errors(tmpdir):
+    lout = Layout('=6sQIcc', 'key', 'timestamp', 'chksum', 'cr', 'nl',
+                  checksum='bsd')
+    assert verify_file(make_file(tmpdir, lout, 0, []), lout) == []
+    with pytest.raises(ValueError):
+        verify_file(str(tmpdir / 'verify'), Layout('=4s', 'key'))
+
+
+def wait_for(cond, timeout=10):
+    end = time.time() + timeout
+    while not cond() and time.time() < end:
+        time.sleep(0.01)
+    assert cond()
+
+
+def test_scrubber(tmpdir):
+    lout = Layout('=6sQIcc', 'key', 'timestamp', 'chksum', 'cr', 'nl',
+                  checksum='crc32')
+    name = make_file(tmpdir, lout, 300, [3, 200])
+    rf = RecordFile(name, blocksize=len(lout))
+    found = []
+    scrubber = Scrubber(rf, lout, rate=10 << 20, callback=found.append,
+                        chunksize=1000, settle=0.01).start()
+    try:
+        wait_for(lambda: scrubber.passes >= 2)
+        assert found == [3, 200]                # reported once
+        assert scrubber.corrupt == set([3, 200])
+
+        r = Record(lout, rf[3])
+        r.set_checksum()
+        rf[3] = r
+        passes = scrubber.passes
+        wait_for(lambda: scrubber.passes >= passes + 2)
+        assert scrubber.corrupt == set([200])
+        assert found == [3, 200]
+        assert 0 <= scrubber.progress <= 1
+        with pytest.raises(RuntimeError):
+            scrubber.start()
+    finally:
+        scrubber.stop()
+    assert not scrubber.running
+    rf.close()
+
+
+def test_scrubber_rate(tmpdir):
+    lout = Layout('=6sQIcc', 'key', 'timestamp', 'chksum', 'cr', 'nl',
+                  checksum='bsd')
+    name = make_file(tmpdir, lout, 300, [])
+    rf = RecordFile(name, blocksize=len(lout))
+    scrubber = Scrubber(rf, lout, rate=50 * len(lout),
+                        chunksize=10 * len(lout)).start()
+    time.sleep(0.2)
+    scrubber.stop()
+    assert 0 < scrubber.checked <= 80          # ~1s burst + 0.2s
+    assert scrubber.passes == 0 and not scrubber.corrupt
+    with pytest.raises(ValueError):
+        Scrubber(rf, Layout('=20s', 'key'))
+    rf.close()